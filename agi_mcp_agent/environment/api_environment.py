@@ -2,15 +2,20 @@
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import urlsplit
 import aiohttp
 import asyncio
+import orjson
 import requests
 
 from agi_mcp_agent.environment.base import Environment
 
 logger = logging.getLogger(__name__)
 
+# 流式读取响应体时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class APIEnvironment(Environment):
     """Environment that interfaces with external APIs."""
@@ -21,7 +26,9 @@ class APIEnvironment(Environment):
         base_url: str, 
         headers: Dict[str, str] = None,
         timeout: int = 30,
-        verify_ssl: bool = True
+        verify_ssl: bool = True,
+        stream_threshold: int = 1024 * 1024,
+        session: Optional[aiohttp.ClientSession] = None
     ):
         """Initialize the API environment.
 
@@ -31,27 +38,57 @@ class APIEnvironment(Environment):
             headers: The headers to use for API requests
             timeout: Request timeout in seconds
             verify_ssl: Whether to verify SSL certificates
+            stream_threshold: Content-Length in bytes above which requests made
+                with stream="auto" return a chunk iterator instead of the body
+            session: A process-wide aiohttp session to send async requests
+                through. It is owned by the caller and is not closed with the
+                environment; when omitted, the environment creates its own.
         """
         super().__init__(name)
         self.base_url = base_url
+        # 初始化时解析一次主机名，日志中无需每次处理完整URL
+        self._host = urlsplit(base_url).netloc or base_url
+        self._base = base_url.rstrip("/")
         self.headers = headers or {}
         self.timeout = timeout
         self.verify_ssl = verify_ssl
+        self.stream_threshold = stream_threshold
         self.state = {"last_response": None, "last_status": None}
-        self.session = None
+        self._client_timeout = aiohttp.ClientTimeout(total=timeout)
+        # 共享会话由调用方管理生命周期，且不携带本环境的默认请求头
+        self._shared_session = session is not None
+        self.session = session
+        self.http_session = None
         logger.info(f"API Environment {self.name} initialized with base URL {base_url}")
 
     async def create_session(self):
-        """Create an aiohttp session for async requests."""
+        """Create an aiohttp session for async requests, or return the shared one."""
+        if self._shared_session:
+            return self.session
         if self.session is None or self.session.closed:
+            # 复用连接并缓存DNS解析结果，避免每次请求重新建立连接
             self.session = aiohttp.ClientSession(
                 headers=self.headers,
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
+                timeout=self._client_timeout,
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=30,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                )
             )
         return self.session
 
+    def get_http_session(self) -> requests.Session:
+        """Get the pooled requests session used by synchronous requests."""
+        if self.http_session is None:
+            self.http_session = requests.Session()
+        return self.http_session
+
     async def close_session(self):
-        """Close the aiohttp session."""
+        """Close the aiohttp session unless it is shared with other environments."""
+        if self._shared_session:
+            return
         if self.session and not self.session.closed:
             await self.session.close()
             self.session = None
@@ -76,12 +113,13 @@ class APIEnvironment(Environment):
         params = action.get("params", {})
         data = action.get("data")
         json_data = action.get("json")
-        headers = {**self.headers, **action.get("headers", {})}
+        extra_headers = action.get("headers")
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
         
-        url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}" if endpoint else self.base_url
+        url = f"{self._base}/{endpoint.lstrip('/')}" if endpoint else self.base_url
         
         try:
-            response = requests.request(
+            response = self.get_http_session().request(
                 method=method,
                 url=url,
                 params=params,
@@ -96,7 +134,7 @@ class APIEnvironment(Environment):
             content_type = response.headers.get("Content-Type", "")
             if "application/json" in content_type:
                 try:
-                    response_data = response.json()
+                    response_data = orjson.loads(response.content)
                 except json.JSONDecodeError:
                     response_data = response.text
             else:
@@ -112,7 +150,8 @@ class APIEnvironment(Environment):
                 "success": 200 <= response.status_code < 300
             }
             
-            logger.info(f"API request to {url} completed with status {response.status_code}")
+            logger.info("API request %s %s/%s completed with status %s",
+                        method, self._host, endpoint.lstrip("/"), response.status_code)
             return result
             
         except Exception as e:
@@ -124,58 +163,91 @@ class APIEnvironment(Environment):
                 "success": False
             }
     
-    async def execute_action_async(self, action: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_action_async(
+        self, action: Dict[str, Any], *, stream: Union[bool, str] = False
+    ) -> Dict[str, Any]:
         """Execute an asynchronous API request.
 
         Args:
             action: The API request to execute (same format as execute_action)
+            stream: True to always stream the body, or "auto" to stream bodies
+                larger than ``stream_threshold``. This is a keyword argument
+                rather than an action key so that actions received over HTTP
+                can never produce a streamed result
 
         Returns:
-            The response from the API
+            The response from the API. Streamed responses carry a ``stream``
+            async iterator of body chunks instead of ``content``; the caller
+            must exhaust or close it to release the connection. Such results
+            are not JSON-serializable and are meant for in-process callers.
         """
         method = action.get("method", "GET").upper()
         endpoint = action.get("endpoint", "")
         params = action.get("params", {})
         data = action.get("data")
         json_data = action.get("json")
-        headers = {**self.headers, **action.get("headers", {})}
+        # 自有会话已带有默认请求头，这里只需传入本次动作额外的请求头；
+        # 共享会话则需要每次带上本环境的默认请求头
+        extra_headers = action.get("headers")
+        if self._shared_session:
+            headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        else:
+            headers = extra_headers or None
         
-        url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}" if endpoint else self.base_url
+        url = f"{self._base}/{endpoint.lstrip('/')}" if endpoint else self.base_url
         
         try:
             session = await self.create_session()
             
-            async with session.request(
+            response = await session.request(
                 method=method,
                 url=url,
                 params=params,
                 data=data,
                 json=json_data,
                 headers=headers,
+                timeout=self._client_timeout,
                 ssl=self.verify_ssl
-            ) as response:
-                
+            )
+            
+            if self._should_stream(stream, response):
+                # 响应体由调用方按块读取，读取结束后再释放连接
+                self.state["last_response"] = None
+                self.state["last_status"] = response.status
+                logger.info("Async API request %s %s/%s streaming with status %s",
+                            method, self._host, endpoint.lstrip("/"), response.status)
+                return {
+                    "status_code": response.status,
+                    "headers": dict(response.headers),
+                    "stream": self._iter_body(response),
+                    "success": 200 <= response.status < 300
+                }
+            
+            try:
                 content_type = response.headers.get("Content-Type", "")
                 if "application/json" in content_type:
                     try:
-                        response_data = await response.json()
+                        response_data = await response.json(loads=orjson.loads)
                     except json.JSONDecodeError:
                         response_data = await response.text()
                 else:
                     response_data = await response.text()
-                
-                self.state["last_response"] = response_data
-                self.state["last_status"] = response.status
-                
-                result = {
-                    "status_code": response.status,
-                    "headers": dict(response.headers),
-                    "content": response_data,
-                    "success": 200 <= response.status < 300
-                }
-                
-                logger.info(f"Async API request to {url} completed with status {response.status}")
-                return result
+            finally:
+                response.release()
+            
+            self.state["last_response"] = response_data
+            self.state["last_status"] = response.status
+            
+            result = {
+                "status_code": response.status,
+                "headers": dict(response.headers),
+                "content": response_data,
+                "success": 200 <= response.status < 300
+            }
+            
+            logger.info("Async API request %s %s/%s completed with status %s",
+                        method, self._host, endpoint.lstrip("/"), response.status)
+            return result
                 
         except Exception as e:
             logger.error(f"Async API request to {url} failed: {str(e)}")
@@ -186,6 +258,36 @@ class APIEnvironment(Environment):
                 "success": False
             }
 
+    def _should_stream(self, stream: Union[bool, str], response: aiohttp.ClientResponse) -> bool:
+        """Decide whether a response body should be streamed instead of buffered.
+
+        Args:
+            stream: The action's stream option: True, False or "auto"
+            response: The response whose headers have been received
+
+        Returns:
+            Whether to stream the body
+        """
+        if stream == "auto":
+            length = response.content_length
+            return length is not None and length > self.stream_threshold
+        return bool(stream)
+
+    async def _iter_body(self, response: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+        """Yield the response body in chunks, releasing the connection when done.
+
+        Args:
+            response: The response to read
+
+        Yields:
+            Chunks of the response body
+        """
+        try:
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            response.release()
+
     def get_observation(self) -> Dict[str, Any]:
         """Get the current state of the environment.
 
@@ -203,6 +305,18 @@ class APIEnvironment(Environment):
         self.state = {"last_response": None, "last_status": None}
         return self.state
     
+    def close(self) -> None:
+        """Close the pooled requests session and the environment."""
+        if self.http_session is not None:
+            self.http_session.close()
+            self.http_session = None
+        super().close()
+
+    async def close_async(self) -> None:
+        """Close the aiohttp session and the environment."""
+        await self.close_session()
+        self.close()
+
     async def __aenter__(self):
         """Async context manager enter."""
         await self.create_session()
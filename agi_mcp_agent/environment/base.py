@@ -1,5 +1,6 @@
 """Base environment interface for agent interactions."""
 
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
@@ -58,106 +59,44 @@ class Environment(ABC):
         logger.info(f"Closing environment {self.name}")
         pass
 
-    def __str__(self) -> str:
-        """Get a string representation of the environment.
-
-        Returns:
-            String representation
-        """
-        return f"Environment(name={self.name})"
-
-
-class APIEnvironment(Environment):
-    """Environment that interfaces with external APIs."""
-
-    def __init__(self, name: str, base_url: str, headers: Dict[str, str] = None):
-        """Initialize the API environment.
-
-        Args:
-            name: The name of the environment
-            base_url: The base URL for API requests
-            headers: The headers to use for API requests
-        """
-        super().__init__(name)
-        self.base_url = base_url
-        self.headers = headers or {}
-        self.state = {}
-        logger.info(f"API Environment {self.name} initialized with base URL {base_url}")
+    async def execute_action_async(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute an action without blocking the event loop.
 
-    def execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute an API request.
+        The default implementation runs execute_action in a worker thread.
+        Environments with native async I/O should override this method.
 
         Args:
-            action: The API request to execute
-
-        Returns:
-            The response from the API
-        """
-        # This would normally use requests or a similar library
-        # to make the actual API call
-        logger.info(f"Executing API request: {action}")
-        return {"status": "not_implemented"}
-
-    def get_observation(self) -> Dict[str, Any]:
-        """Get the current state of the environment.
+            action: The action to execute
 
         Returns:
-            The current state
+            The result of the action
         """
-        return self.state
+        return await asyncio.to_thread(self.execute_action, action)
 
-    def reset(self) -> Dict[str, Any]:
-        """Reset the environment state.
+    async def get_observation_async(self) -> Dict[str, Any]:
+        """Get an observation without blocking the event loop.
 
         Returns:
-            The initial state
-        """
-        self.state = {}
-        return self.state
-
-
-class FileSystemEnvironment(Environment):
-    """Environment that provides access to the file system."""
-
-    def __init__(self, name: str, root_dir: str):
-        """Initialize the file system environment.
-
-        Args:
-            name: The name of the environment
-            root_dir: The root directory for file operations
+            The observation
         """
-        super().__init__(name)
-        self.root_dir = root_dir
-        self.state = {"current_dir": root_dir}
-        logger.info(f"FileSystem Environment {self.name} initialized with root dir {root_dir}")
-
-    def execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a file system operation.
+        return await asyncio.to_thread(self.get_observation)
 
-        Args:
-            action: The operation to execute
+    async def reset_async(self) -> Dict[str, Any]:
+        """Reset the environment without blocking the event loop.
 
         Returns:
-            The result of the operation
+            The initial observation
         """
-        # This would normally implement various file operations
-        # such as read, write, list, etc.
-        logger.info(f"Executing file system operation: {action}")
-        return {"status": "not_implemented"}
-
-    def get_observation(self) -> Dict[str, Any]:
-        """Get the current state of the file system.
+        return await asyncio.to_thread(self.reset)
 
-        Returns:
-            The current state
-        """
-        return self.state
+    async def close_async(self) -> None:
+        """Close the environment without blocking the event loop."""
+        await asyncio.to_thread(self.close)
 
-    def reset(self) -> Dict[str, Any]:
-        """Reset the environment state.
+    def __str__(self) -> str:
+        """Get a string representation of the environment.
 
         Returns:
-            The initial state
+            String representation
         """
-        self.state = {"current_dir": self.root_dir}
-        return self.state 
\ No newline at end of file
+        return f"Environment(name={self.name})"
@@ -1,24 +1,241 @@
 """Browser MCP environment implementation for agent interactions with browser and Google search."""
 
+import heapq
+import itertools
 import json
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 import re
-import urllib.parse
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 
 from agi_mcp_agent.environment.base import Environment
 from agi_mcp_agent.environment.web_environment import WebEnvironment
 
 logger = logging.getLogger(__name__)
 
+# 浏览网页时返回的正文最大字符数
+CONTENT_PREVIEW_CHARS = 5000
+
+# 提取网页正文时用于清理空白的预编译正则，\s已包含换行
+_WS_RE = re.compile(r'\s+')
+# 解析前直接去掉script/style块，减少解析器需要处理的输入
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+
+# 搜索结果页的预编译XPath：结果块内的标题、链接和摘要
+_HAS_CLASS = 'contains(concat(" ", normalize-space(@class), " "), " {} ")'
+_SERP_TITLE_XPATH = etree.XPath("string((.//h3)[1])")
+_SERP_HAS_TITLE_XPATH = etree.XPath("boolean(.//h3)")
+_SERP_LINK_XPATH = etree.XPath("(.//a)[1]")
+_SERP_SNIPPET_XPATH = etree.XPath(f'string((.//div[{_HAS_CLASS.format("VwiC3b")}])[1])')
+
+# 已解码为str但带有编码声明的文档需按UTF-8字节重新解析
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+# 权威度评分规则：教育/政府/组织域名，以及常见的知名站点
+_AUTHORITATIVE_SUFFIXES = (".edu", ".gov", ".org")
+_WELL_KNOWN_SITES = ("wikipedia", "github", "medium", "stackoverflow")
+
+
+# 推荐理由按触发条件的位掩码预先生成：相关性高=1，相关性中=2，权威性高=4，时效性高=8
+_REASON_HIGH_RELEVANCE = 1
+_REASON_RELEVANCE = 2
+_REASON_AUTHORITY = 4
+_REASON_RECENCY = 8
+_REASON_PHRASES = (
+    (_REASON_HIGH_RELEVANCE, "highly relevant to your search query"),
+    (_REASON_RELEVANCE, "relevant to your search query"),
+    (_REASON_AUTHORITY, "from a trustworthy source"),
+    (_REASON_RECENCY, "contains recent information"),
+)
+
+
+def _build_reason(mask: int) -> str:
+    """Compose the recommendation reason for a set of triggered reason bits.
+
+    Args:
+        mask: Bitwise OR of the _REASON_* flags that apply
+
+    Returns:
+        The reason sentence
+    """
+    reason_parts = [phrase for bit, phrase in _REASON_PHRASES if mask & bit]
+    # Default reason if nothing specific stands out
+    if not reason_parts:
+        return "This result may answer your query based on overall quality"
+    if len(reason_parts) == 1:
+        return f"This result is {reason_parts[0]}"
+    return f"This result is {', '.join(reason_parts[:-1])} and {reason_parts[-1]}"
+
+
+_REASON_TABLE: Dict[int, str] = {mask: _build_reason(mask) for mask in range(16)}
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """A search result extracted from a results page.
+
+    Kept in the search cache instead of a dict per result; callers receive
+    plain dicts built with ``as_dict``.
+    """
+
+    __slots__ = ("title", "url", "snippet")
+    title: str
+    url: str
+    snippet: str
+
+    def __getstate__(self) -> Tuple[str, str, str]:
+        """Return the field values for copy and pickle (slotted classes have no __dict__)."""
+        return (self.title, self.url, self.snippet)
+
+    def __setstate__(self, state: Tuple[str, str, str]) -> None:
+        """Restore the field values, bypassing the frozen __setattr__."""
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the result in the dict form used by actions and state."""
+        return {"title": self.title, "url": self.url, "snippet": self.snippet}
+
+
+def _parse_html(content: str) -> Optional[lxml.html.HtmlElement]:
+    """Parse an HTML document with lxml.
+
+    Args:
+        content: The decoded page HTML
+
+    Returns:
+        The document root, or None if the page has no parseable content
+    """
+    if not content or content.isspace():
+        return None
+    try:
+        return lxml.html.document_fromstring(content)
+    except ValueError:
+        # lxml拒绝解析带有XML编码声明的str
+        return lxml.html.document_fromstring(content.encode("utf-8"), parser=_UTF8_HTML_PARSER)
+    except etree.ParserError:
+        return None
+
+
+# 分词时将ASCII标点视为分隔符，"asyncio," 与 "asyncio" 视为同一个词
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+
+def _is_serp_result(elem: lxml.html.HtmlElement) -> bool:
+    """Check whether an element is a search result block (div.g).
+
+    Args:
+        elem: The element to check
+
+    Returns:
+        True if the element carries the result block class
+    """
+    return "g" in elem.get("class", "").split()
+
+
+def _serp_result_blocks(tree: lxml.html.HtmlElement):
+    """Lazily yield the outermost result blocks of a results page in document order.
+
+    Args:
+        tree: The parsed results page
+
+    Yields:
+        Each result block that is not nested inside another result block
+    """
+    for elem in tree.iter("div"):
+        # 只对命中的块检查祖先，嵌套的结果块不单独算作一条结果
+        if _is_serp_result(elem) and not any(map(_is_serp_result, elem.iterancestors("div"))):
+            yield elem
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into lowercase words, treating punctuation as whitespace.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        The words in the text
+    """
+    return text.lower().translate(_PUNCTUATION_TO_SPACE).split()
+
+
+def _relevance_scores(query: Optional[str], titles: List[str], snippets: List[str]) -> List[float]:
+    """Score how well each result's title and snippet match the query.
+
+    Args:
+        query: The search query
+        titles: Result titles
+        snippets: Result snippets, parallel to ``titles``
+
+    Returns:
+        One 0-10 relevance score per result
+    """
+    # 查询分词与所有结果无关，只计算一次
+    query_tokens = frozenset(_tokens(query)) if query else frozenset()
+    if not query_tokens:
+        return [0] * len(titles)
+    
+    scale = 10 / (len(query_tokens) * 3)
+    intersect = query_tokens.intersection
+    return [
+        # Scale to 0-10
+        min((len(intersect(_tokens(title))) * 2 + len(intersect(_tokens(snippet)))) * scale, 10)
+        for title, snippet in zip(titles, snippets)
+    ]
+
+
+def _netloc(url: str) -> str:
+    """Return the network location of an absolute URL, like urlparse(url).netloc.
+
+    Args:
+        url: The URL
+
+    Returns:
+        The netloc, or an empty string if the URL has no scheme
+    """
+    rest = url.partition("://")[2]
+    for separator in ("/", "?", "#"):
+        rest = rest.partition(separator)[0]
+    return rest
+
+
+@lru_cache(maxsize=4096)
+def _authority_for_domain(domain: str) -> int:
+    """Score how authoritative a domain is on a 0-10 scale.
+
+    Args:
+        domain: The domain (netloc) of a result URL
+
+    Returns:
+        The authority score
+    """
+    # Educational or government domains
+    if domain.endswith(_AUTHORITATIVE_SUFFIXES):
+        return 8
+    # Well-known domains (simplified example)
+    if any(known in domain for known in _WELL_KNOWN_SITES):
+        return 7
+    return 5  # Default score
+
 
 class BrowserMCPEnvironment(Environment):
     """Environment that provides access to browser and Google search with MCP capabilities."""
 
+    _DEFAULT_CRITERIA = ("relevance", "authority", "recency")
+    # 未传入results时会读取上一次搜索结果的操作，批量并发执行时结果不确定
+    _STATEFUL_OPERATIONS = frozenset({"analyze_results", "generate_recommendations"})
+
     def __init__(
         self, 
         name: str, 
@@ -26,7 +243,9 @@ class BrowserMCPEnvironment(Environment):
         timeout: int = 30,
         max_retries: int = 3,
         user_agent: str = None,
-        recommendation_count: int = 3
+        recommendation_count: int = 3,
+        search_cache_size: int = 128,
+        batch_workers: int = 4
     ):
         """Initialize the browser MCP environment.
 
@@ -37,6 +256,9 @@ class BrowserMCPEnvironment(Environment):
             max_retries: Maximum number of retries for failed requests
             user_agent: User agent string to use (if None, a default is provided)
             recommendation_count: Number of recommendations to generate
+            search_cache_size: Number of queries whose parsed results are
+                kept, 0 to disable caching
+            batch_workers: Number of threads used by execute_actions_batch
         """
         super().__init__(name)
         
@@ -51,16 +273,41 @@ class BrowserMCPEnvironment(Environment):
         
         self.recommendation_count = recommendation_count
         
-        # State management
-        self.state = {
-            "last_search_query": None,
-            "last_search_results": None,
-            "last_recommendations": None,
-            "last_error": None
+        # 同一会话中代理经常重复相同的搜索，缓存解析后的结果避免重复请求和解析
+        self.search_cache_size = search_cache_size
+        # 查询 -> (解析时的结果数上限, 解析结果)
+        self._search_cache: "OrderedDict[str, Tuple[int, Tuple[SearchResult, ...]]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        
+        # 批量执行动作的线程池，首次使用时创建
+        self.batch_workers = batch_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # 操作名 -> 处理方法，execute_action只需一次字典查找
+        self._operations = {
+            "google_search": self._dispatch_search,
+            "analyze_results": self._dispatch_analyze,
+            "generate_recommendations": self._dispatch_recommendations,
+            "browse_url": self._dispatch_browse,
         }
         
+        # State management（使用实例属性而非字典，热路径上省去哈希查找）
+        self._reset_state()
+        
         logger.info(f"Browser MCP Environment {self.name} initialized")
     
+    def _reset_state(self) -> None:
+        """Set the search state attributes to their initial values.
+
+        The search state lives only in these attributes; there is no ``state``
+        dict. Use get_observation() for a summary.
+        """
+        self.last_search_query: Optional[str] = None
+        self.last_search_results: List[Dict[str, Any]] = []
+        self.last_recommendations: List[Dict[str, Any]] = []
+        self.last_error: Optional[str] = None
+    
     def execute_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a browser MCP action.
 
@@ -73,40 +320,92 @@ class BrowserMCPEnvironment(Environment):
             The result of the operation
         """
         operation = action.get("operation", "").lower()
+        handler = self._operations.get(operation)
+        if handler is None:
+            logger.warning(f"Unknown browser MCP operation: {operation}")
+            return {"success": False, "error": f"Unknown operation: {operation}"}
         
         try:
-            if operation == "google_search":
-                return self._google_search(
-                    query=action.get("query", ""),
-                    num_results=action.get("num_results", 10)
-                )
-            elif operation == "analyze_results":
-                return self._analyze_results(
-                    query=action.get("query", ""),
-                    results=action.get("results", None),
-                    criteria=action.get("criteria", None)
-                )
-            elif operation == "generate_recommendations":
-                return self._generate_recommendations(
-                    query=action.get("query", ""),
-                    results=action.get("results", None),
-                    analysis=action.get("analysis", None),
-                    count=action.get("count", self.recommendation_count)
-                )
-            elif operation == "browse_url":
-                return self._browse_url(
-                    url=action.get("url", ""),
-                    extract_content=action.get("extract_content", True)
-                )
-            else:
-                logger.warning(f"Unknown browser MCP operation: {operation}")
-                return {"success": False, "error": f"Unknown operation: {operation}"}
-                
+            return handler(action)
         except Exception as e:
             logger.error(f"Error in browser MCP operation {operation}: {str(e)}")
-            self.state["last_error"] = str(e)
+            self.last_error = str(e)
             return {"success": False, "error": str(e)}
     
+    def execute_actions_batch(self, actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute several browser MCP actions concurrently.
+
+        Fetches overlap on the pooled HTTP session and lxml releases the GIL
+        while parsing, so independent searches and page visits run in parallel.
+        Actions in a batch must be independent: analyze_results and
+        generate_recommendations must pass explicit ``results``, since the
+        last search results are overwritten by whichever search finishes last.
+        Such actions without ``results`` fail without running. After the
+        batch, the search and page state reflect the last action to finish.
+
+        Args:
+            actions: The actions to execute, in the format of execute_action
+
+        Returns:
+            One result per action, in request order
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.batch_workers,
+                        thread_name_prefix=f"{self.name}-batch"
+                    )
+        return list(self._executor.map(self._execute_batched_action, actions))
+    
+    def _execute_batched_action(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one action of a batch, rejecting actions that depend on shared state.
+
+        Args:
+            action: The action to execute
+
+        Returns:
+            The result of the action
+        """
+        operation = action.get("operation", "").lower()
+        if operation in self._STATEFUL_OPERATIONS and action.get("results") is None:
+            return {
+                "success": False,
+                "error": f"Operation {operation} requires explicit results when batched"
+            }
+        return self.execute_action(action)
+    
+    def _dispatch_search(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a google_search action."""
+        return self._google_search(
+            query=action.get("query", ""),
+            num_results=action.get("num_results", 10)
+        )
+    
+    def _dispatch_analyze(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an analyze_results action."""
+        return self._analyze_results(
+            query=action.get("query", ""),
+            results=action.get("results", None),
+            criteria=action.get("criteria", None)
+        )
+    
+    def _dispatch_recommendations(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a generate_recommendations action."""
+        return self._generate_recommendations(
+            query=action.get("query", ""),
+            results=action.get("results", None),
+            analysis=action.get("analysis", None),
+            count=action.get("count", self.recommendation_count)
+        )
+    
+    def _dispatch_browse(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a browse_url action."""
+        return self._browse_url(
+            url=action.get("url", ""),
+            extract_content=action.get("extract_content", True)
+        )
+    
     def _google_search(self, query: str, num_results: int = 10) -> Dict[str, Any]:
         """Perform a Google search.
 
@@ -120,48 +419,45 @@ class BrowserMCPEnvironment(Environment):
         if not query:
             return {"success": False, "error": "No search query provided"}
         
-        # Use the web environment to perform the search
-        search_action = {
-            "action_type": "search",
-            "query": query,
-            "engine": "google"
-        }
-        
-        search_result = self.web_env.execute_action(search_action)
-        
-        if not search_result.get("success", False):
-            return search_result
-        
-        # Extract search results
-        soup = BeautifulSoup(search_result.get("content", ""), "html.parser")
-        results = []
-        
-        # Process search results
-        result_elements = soup.select("div.g")[:num_results]
-        
-        for elem in result_elements:
-            try:
-                title_elem = elem.select_one("h3")
-                link_elem = elem.select_one("a")
-                snippet_elem = elem.select_one("div.VwiC3b")
-                
-                if title_elem and link_elem:
-                    title = title_elem.get_text()
-                    link = link_elem.get("href")
-                    snippet = snippet_elem.get_text() if snippet_elem else ""
-                    
-                    if link and link.startswith("http"):
-                        results.append({
-                            "title": title,
-                            "url": link,
-                            "snippet": snippet
-                        })
-            except Exception as e:
-                logger.error(f"Error extracting search result: {str(e)}")
+        # 结果页只取决于查询，num_results只限制解析的结果数：
+        # 按查询缓存，已按更大上限解析过的结果页直接截取，无需重新请求和解析
+        parsed = None
+        with self._search_cache_lock:
+            cached = self._search_cache.get(query)
+            if cached is not None and cached[0] >= num_results:
+                self._search_cache.move_to_end(query)
+                parsed = cached[1][:num_results]
+        if parsed is None:
+            # Use the web environment to perform the search
+            # 只在这里解析一次结果页，WebEnvironment无需再构建完整的soup
+            search_action = {
+                "action_type": "search",
+                "query": query,
+                "engine": "google",
+                "parse": False,
+                "include_content": True
+            }
+            
+            search_result = self.web_env.execute_action(search_action)
+            
+            if not search_result.get("success", False):
+                return search_result
+            
+            parsed = self._parse_search_results(search_result.get("content") or "", num_results)
+            # 空结果通常意味着页面被拦截或结构变化，不缓存以便下次重试
+            if parsed and self.search_cache_size > 0:
+                with self._search_cache_lock:
+                    self._search_cache[query] = (num_results, parsed)
+                    self._search_cache.move_to_end(query)
+                    if len(self._search_cache) > self.search_cache_size:
+                        self._search_cache.popitem(last=False)
+        
+        # 每次调用返回新的dict列表，调用方修改结果不会影响缓存
+        results = [result.as_dict() for result in parsed]
         
         # Store results in state
-        self.state["last_search_query"] = query
-        self.state["last_search_results"] = results
+        self.last_search_query = query
+        self.last_search_results = results
         
         return {
             "success": True,
@@ -170,6 +466,38 @@ class BrowserMCPEnvironment(Environment):
             "results_count": len(results)
         }
     
+    def _parse_search_results(self, content: str, num_results: int) -> Tuple[SearchResult, ...]:
+        """Extract result titles, links and snippets from a Google results page.
+
+        Args:
+            content: The results page HTML
+            num_results: Maximum number of results to extract
+
+        Returns:
+            The extracted search results
+        """
+        tree = _parse_html(content)
+        if tree is None:
+            return ()
+        results = []
+        
+        # 惰性遍历文档，取够num_results个结果块后即停止
+        for elem in itertools.islice(_serp_result_blocks(tree), num_results):
+            links = _SERP_LINK_XPATH(elem)
+            if not links or not _SERP_HAS_TITLE_XPATH(elem):
+                continue
+            
+            link = links[0].get("href")
+            if link and link.startswith("http"):
+                # XPath字符串结果会引用所在的文档树，转换为普通str以免缓存的结果拖住整棵树
+                results.append(SearchResult(
+                    title=str(_SERP_TITLE_XPATH(elem)),
+                    url=str(link),
+                    snippet=str(_SERP_SNIPPET_XPATH(elem))
+                ))
+        
+        return tuple(results)
+    
     def _analyze_results(self, query: str = None, results: List[Dict[str, Any]] = None, criteria: List[str] = None) -> Dict[str, Any]:
         """Analyze search results based on criteria.
 
@@ -183,7 +511,7 @@ class BrowserMCPEnvironment(Environment):
         """
         # Use provided results or last results from state
         if results is None:
-            results = self.state.get("last_search_results", [])
+            results = self.last_search_results
             if not results:
                 # If no results in state, try to perform a search if query is provided
                 if query:
@@ -196,58 +524,53 @@ class BrowserMCPEnvironment(Environment):
         
         # Use default criteria if none provided
         if criteria is None:
-            criteria = ["relevance", "authority", "recency"]
+            criteria = list(self._DEFAULT_CRITERIA)
         
-        analysis = {}
+        # 按字段拆成并行列表，每个评估维度对整列计算一次，维度判断不再逐条结果重复
+        titles = [result.get("title", "") for result in results]
+        urls = [result.get("url", "") for result in results]
         
-        # Perform basic analysis on each result
-        for i, result in enumerate(results):
-            result_analysis = {}
-            
-            # Basic analysis based on criteria
-            for criterion in criteria:
-                if criterion == "relevance":
-                    # Simple relevance score based on keyword presence in title/snippet
-                    score = 0
-                    if query:
-                        keywords = set(query.lower().split())
-                        title_words = set(result.get("title", "").lower().split())
-                        snippet_words = set(result.get("snippet", "").lower().split())
-                        
-                        common_title = keywords.intersection(title_words)
-                        common_snippet = keywords.intersection(snippet_words)
-                        
-                        score = (len(common_title) * 2 + len(common_snippet)) / (len(keywords) * 3)
-                        score = min(score * 10, 10)  # Scale to 0-10
-                    
-                    result_analysis["relevance"] = score
-                    
-                elif criterion == "authority":
-                    # Simple authority heuristic based on domain
-                    url = result.get("url", "")
-                    domain = urllib.parse.urlparse(url).netloc
-                    
-                    # Very basic authority scoring
-                    authority_score = 5  # Default score
-                    
-                    # Educational or government domains
-                    if domain.endswith((".edu", ".gov", ".org")):
-                        authority_score = 8
-                    # Well-known domains (simplified example)
-                    elif any(known in domain for known in ["wikipedia", "github", "medium", "stackoverflow"]):
-                        authority_score = 7
-                    
-                    result_analysis["authority"] = authority_score
-                    
-                elif criterion == "recency":
-                    # For recency, we would need to visit each page and extract dates
-                    # This is a simplified version that defaults to a neutral score
-                    result_analysis["recency"] = 5  # Default neutral score
-            
-            analysis[f"result_{i+1}"] = {
-                "title": result.get("title", ""),
-                "url": result.get("url", ""),
-                "analysis": result_analysis
+        scores: Dict[str, List[Any]] = {}
+        for criterion in criteria:
+            if criterion in scores:
+                continue
+            if criterion == "relevance":
+                # Simple relevance score based on keyword presence in title/snippet
+                snippets = [result.get("snippet", "") for result in results]
+                scores["relevance"] = _relevance_scores(query, titles, snippets)
+                
+            elif criterion == "authority":
+                # Simple authority heuristic based on domain
+                # 评分只取决于域名，结果中反复出现的域名直接命中缓存
+                scores["authority"] = [
+                    _authority_for_domain(_netloc(url)) for url in urls
+                ]
+                
+            elif criterion == "recency":
+                # For recency, we would need to visit each page and extract dates
+                # This is a simplified version that defaults to a neutral score
+                scores["recency"] = [5] * len(results)  # Default neutral score
+        
+        if tuple(criteria) == self._DEFAULT_CRITERIA:
+            # 默认维度：直接按固定键构建每条结果的评分，省去逐条遍历维度列
+            analysis = {
+                f"result_{i+1}": {
+                    "title": title,
+                    "url": url,
+                    "analysis": {"relevance": relevance, "authority": authority, "recency": recency}
+                }
+                for i, (title, url, relevance, authority, recency) in enumerate(
+                    zip(titles, urls, scores["relevance"], scores["authority"], scores["recency"])
+                )
+            }
+        else:
+            analysis = {
+                f"result_{i+1}": {
+                    "title": title,
+                    "url": url,
+                    "analysis": {criterion: column[i] for criterion, column in scores.items()}
+                }
+                for i, (title, url) in enumerate(zip(titles, urls))
             }
         
         return {
@@ -279,13 +602,13 @@ class BrowserMCPEnvironment(Environment):
         
         # Use provided results or last results from state
         if results is None:
-            results = self.state.get("last_search_results", [])
+            results = self.last_search_results
         
         if not results or not analysis:
             return {"success": False, "error": "Insufficient data for generating recommendations"}
         
-        # Process and rank results
-        ranked_results = []
+        # Process and rank results: score every result, but only build output for the top ones
+        scored_results = []
         
         for key, item in analysis.items():
             if not key.startswith("result_"):
@@ -293,47 +616,31 @@ class BrowserMCPEnvironment(Environment):
                 
             idx = int(key.split("_")[1]) - 1
             if idx < len(results):
-                result = results[idx]
-                
                 # Calculate composite score
                 item_analysis = item.get("analysis", {})
                 composite_score = sum(item_analysis.values()) / len(item_analysis) if item_analysis else 0
-                
-                ranked_results.append({
-                    "title": result.get("title", ""),
-                    "url": result.get("url", ""),
-                    "snippet": result.get("snippet", ""),
-                    "score": composite_score,
-                    "analysis": item_analysis
-                })
+                scored_results.append((composite_score, idx, item_analysis))
         
-        # Sort by composite score
-        ranked_results.sort(key=lambda x: x["score"], reverse=True)
+        # Select by composite score (nlargest keeps the original order among ties, like a stable sort)
+        top_results = heapq.nlargest(count, scored_results, key=lambda scored: scored[0])
         
         # Generate recommendations with reasoning
         recommendations = []
-        for i, result in enumerate(ranked_results[:count]):
-            # Generate reason based on analysis
-            reason_parts = []
-            
-            analysis_data = result.get("analysis", {})
+        for _, idx, analysis_data in top_results:
+            result = results[idx]
             
-            if "relevance" in analysis_data and analysis_data["relevance"] > 7:
-                reason_parts.append("highly relevant to your search query")
-            elif "relevance" in analysis_data and analysis_data["relevance"] > 5:
-                reason_parts.append("relevant to your search query")
-                
-            if "authority" in analysis_data and analysis_data["authority"] > 7:
-                reason_parts.append("from a trustworthy source")
-                
-            if "recency" in analysis_data and analysis_data["recency"] > 7:
-                reason_parts.append("contains recent information")
-            
-            # Default reason if nothing specific stands out
-            if not reason_parts:
-                reason = "This result may answer your query based on overall quality"
-            else:
-                reason = f"This result is {', '.join(reason_parts[:-1])}{' and ' if len(reason_parts) > 1 else ''}{reason_parts[-1] if reason_parts else ''}"
+            # Generate reason based on analysis
+            relevance = analysis_data.get("relevance", 0)
+            mask = 0
+            if relevance > 7:
+                mask |= _REASON_HIGH_RELEVANCE
+            elif relevance > 5:
+                mask |= _REASON_RELEVANCE
+            if analysis_data.get("authority", 0) > 7:
+                mask |= _REASON_AUTHORITY
+            if analysis_data.get("recency", 0) > 7:
+                mask |= _REASON_RECENCY
+            reason = _REASON_TABLE[mask]
             
             recommendations.append({
                 "title": result.get("title", ""),
@@ -343,7 +650,7 @@ class BrowserMCPEnvironment(Environment):
             })
         
         # Store recommendations in state
-        self.state["last_recommendations"] = recommendations
+        self.last_recommendations = recommendations
         
         return {
             "success": True,
@@ -359,13 +666,17 @@ class BrowserMCPEnvironment(Environment):
             extract_content: Whether to extract and analyze the content
 
         Returns:
-            The browsing result
+            The browsing result. Text extraction stops once the content preview
+            is full, so ``full_content_length`` is exact for pages that fit in
+            the preview and an estimate (counting uncollapsed whitespace) for
+            longer ones
         """
-        # Use the web environment to visit the URL
+        # Use the web environment to fetch the URL; the page is parsed once below
         visit_action = {
             "action_type": "visit",
             "url": url,
-            "parse": extract_content
+            "parse": False,
+            "include_content": extract_content
         }
         
         visit_result = self.web_env.execute_action(visit_action)
@@ -377,25 +688,44 @@ class BrowserMCPEnvironment(Environment):
             return visit_result
             
         # Extract main content (simplified)
-        soup = BeautifulSoup(visit_result.get("content", ""), "html.parser")
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.extract()
+        # 从本次结果读取页面内容（而非共享状态），批量并发浏览时互不干扰
+        content = visit_result.pop("content", None) or ""
+        tree = _parse_html(_SCRIPT_STYLE_RE.sub("", content))
+        parts = []
+        length = 0
+        if tree is None:
+            title = "No title"
+        else:
+            title = tree.findtext(".//title")
+            title = title.strip() if title is not None else "No title"
             
-        # Get text
-        text = soup.get_text(separator="\n", strip=True)
-        
-        # Clean text (remove excessive newlines, etc.)
-        text = re.sub(r'\n+', '\n', text)
-        text = re.sub(r'\s+', ' ', text)
+            # Remove remaining script, style and noscript elements (drop_tree keeps the text that follows them)
+            for element in tree.xpath("//script|//style|//noscript"):
+                element.drop_tree()
+                
+            # Get text, cleaning each text node (remove excessive newlines, etc.)
+            # and stopping once the preview is full instead of joining the whole page
+            texts = tree.itertext()
+            for chunk in texts:
+                piece = _WS_RE.sub(' ', chunk).strip()
+                if not piece:
+                    continue
+                length += len(piece) + (1 if parts else 0)
+                parts.append(piece)
+                if length > CONTENT_PREVIEW_CHARS:
+                    # 剩余文本只统计长度，不再清理和拼接
+                    length += sum(map(len, texts))
+                    break
+        
+        text = " ".join(parts)
         
         return {
             "success": True,
             "url": url,
-            "title": visit_result.get("title", ""),
-            "content": text[:5000] + "..." if len(text) > 5000 else text,  # Truncate long content
-            "full_content_length": len(text)
+            "title": title,
+            # Truncate long content
+            "content": text[:CONTENT_PREVIEW_CHARS] + "..." if length > CONTENT_PREVIEW_CHARS else text,
+            "full_content_length": length
         }
     
     def get_observation(self) -> Dict[str, Any]:
@@ -405,10 +735,10 @@ class BrowserMCPEnvironment(Environment):
             The current state
         """
         return {
-            "last_search_query": self.state.get("last_search_query"),
-            "results_count": len(self.state.get("last_search_results", [])),
-            "recommendations_count": len(self.state.get("last_recommendations", [])),
-            "last_error": self.state.get("last_error")
+            "last_search_query": self.last_search_query,
+            "results_count": len(self.last_search_results),
+            "recommendations_count": len(self.last_recommendations),
+            "last_error": self.last_error
         }
     
     def reset(self) -> Dict[str, Any]:
@@ -417,12 +747,9 @@ class BrowserMCPEnvironment(Environment):
         Returns:
             The initial state
         """
-        self.state = {
-            "last_search_query": None,
-            "last_search_results": None,
-            "last_recommendations": None,
-            "last_error": None
-        }
+        self._reset_state()
+        with self._search_cache_lock:
+            self._search_cache.clear()
         
         # Also reset the underlying web environment
         self.web_env.reset()
@@ -431,5 +758,8 @@ class BrowserMCPEnvironment(Environment):
         
     def close(self) -> None:
         """Close all connections."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         self.web_env.close()
         logger.info(f"Closed Browser MCP environment {self.name}") 
\ No newline at end of file
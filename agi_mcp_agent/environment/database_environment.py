@@ -2,16 +2,45 @@
 
 import logging
 import json
-from typing import Any, Dict, List, Optional, Union, Tuple
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Union, Tuple
 
-import sqlalchemy
-from sqlalchemy import create_engine, text, Table, MetaData, inspect
+from sqlalchemy import create_engine, text, inspect
+from sqlalchemy.engine import Engine, Inspector, make_url
 from sqlalchemy.exc import SQLAlchemyError
 
 from agi_mcp_agent.environment.base import Environment
 
 logger = logging.getLogger(__name__)
 
+# 表结构信息（Inspector缓存和表名集合）的有效期，单位秒
+SCHEMA_CACHE_TTL = 60
+
+# 进程内共享的引擎（连接池），连接同一数据库的多个环境实例复用；
+# 按引用计数管理，最后一个使用者关闭时释放连接池并移出缓存
+_ENGINE_CACHE: Dict[str, Engine] = {}
+_ENGINE_REFS: Dict[str, int] = {}
+_ENGINE_CACHE_LOCK = threading.Lock()
+
+
+def _engine_cache_key(connection_string: str, echo: bool, engine_params: Dict[str, Any]) -> Optional[str]:
+    """Build the shared-engine cache key for a connection.
+
+    Args:
+        connection_string: SQLAlchemy connection string
+        echo: Whether the engine echoes SQL
+        engine_params: Extra keyword arguments for create_engine
+
+    Returns:
+        The cache key, or None if the engine must not be shared
+    """
+    url = make_url(connection_string)
+    # 内存SQLite数据库属于各自的引擎，共享引擎会让不同环境看到同一个库
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return None
+    return json.dumps([connection_string, echo, engine_params], sort_keys=True, default=str)
+
 
 class DatabaseEnvironment(Environment):
     """Environment that provides access to databases."""
@@ -22,7 +51,9 @@ class DatabaseEnvironment(Environment):
         connection_string: str,
         max_results: int = 1000,
         echo: bool = False,
-        schema: str = None
+        schema: str = None,
+        arraysize: Optional[int] = None,
+        engine_params: Optional[Dict[str, Any]] = None
     ):
         """Initialize the database environment.
 
@@ -32,15 +63,23 @@ class DatabaseEnvironment(Environment):
             max_results: Maximum number of results to return for queries
             echo: Whether to echo SQL queries (for debugging)
             schema: The database schema to use
+            arraysize: Rows fetched from the driver per round trip
+                (defaults to the number of rows a query needs)
+            engine_params: Extra keyword arguments for create_engine
         """
         super().__init__(name)
         self.connection_string = connection_string
         self.max_results = max_results
         self.echo = echo
         self.schema = schema
+        self.arraysize = arraysize
+        self.engine_params = engine_params or {}
+        self._engine_key = None
         self.engine = None
-        self.metadata = None
         self.connection = None
+        self._inspector: Optional[Inspector] = None
+        self._inspector_created = 0.0
+        self._table_names: Optional[Set[str]] = None
         self.state = {
             "connected": False,
             "last_query": None,
@@ -56,9 +95,20 @@ class DatabaseEnvironment(Environment):
     def _initialize_connection(self):
         """Initialize the database connection."""
         try:
-            self.engine = create_engine(self.connection_string, echo=self.echo)
-            self.metadata = MetaData(schema=self.schema)
-            self.metadata.reflect(bind=self.engine)
+            # 重新连接时先归还之前持有的引擎
+            self._release_engine()
+            self._engine_key = _engine_cache_key(self.connection_string, self.echo, self.engine_params)
+            if self._engine_key is None:
+                self.engine = create_engine(self.connection_string, echo=self.echo, **self.engine_params)
+            else:
+                with _ENGINE_CACHE_LOCK:
+                    engine = _ENGINE_CACHE.get(self._engine_key)
+                    if engine is None:
+                        engine = create_engine(self.connection_string, echo=self.echo, **self.engine_params)
+                        _ENGINE_CACHE[self._engine_key] = engine
+                    _ENGINE_REFS[self._engine_key] = _ENGINE_REFS.get(self._engine_key, 0) + 1
+                    self.engine = engine
+            self._invalidate_schema_cache()
             self.state["connected"] = True
             logger.info(f"Connected to database ({self.connection_string.split('@')[-1]})")
         except Exception as e:
@@ -66,6 +116,53 @@ class DatabaseEnvironment(Environment):
             self.state["last_error"] = str(e)
             self.state["connected"] = False
 
+    def _release_engine(self) -> None:
+        """Give up this environment's engine, disposing it once no environment uses it."""
+        engine, self.engine = self.engine, None
+        if engine is None:
+            return
+        self._invalidate_schema_cache()
+        if self._engine_key is not None:
+            with _ENGINE_CACHE_LOCK:
+                if _ENGINE_CACHE.get(self._engine_key) is not engine:
+                    return
+                _ENGINE_REFS[self._engine_key] -= 1
+                if _ENGINE_REFS[self._engine_key] > 0:
+                    return
+                del _ENGINE_CACHE[self._engine_key]
+                del _ENGINE_REFS[self._engine_key]
+        engine.dispose()
+
+    def _get_inspector(self) -> Inspector:
+        """Get the schema inspector, replacing it once its cached results expire.
+
+        Returns:
+            The schema inspector
+        """
+        now = time.monotonic()
+        if self._inspector is None or now - self._inspector_created > SCHEMA_CACHE_TTL:
+            # Inspector会缓存每次反射的结果，定期重建以看到外部的结构变更
+            self._inspector = inspect(self.engine)
+            self._inspector_created = now
+            self._table_names = None
+        return self._inspector
+
+    def _get_table_names(self) -> Set[str]:
+        """Get the names of the tables in the schema.
+
+        Returns:
+            The table names
+        """
+        inspector = self._get_inspector()
+        if self._table_names is None:
+            self._table_names = set(inspector.get_table_names(schema=self.schema))
+        return self._table_names
+
+    def _invalidate_schema_cache(self) -> None:
+        """Drop cached schema information so the next lookup reflects again."""
+        self._inspector = None
+        self._table_names = None
+
     def _get_connection(self):
         """Get a database connection, creating it if necessary."""
         if not self.engine or not self.state["connected"]:
@@ -105,6 +202,8 @@ class DatabaseEnvironment(Environment):
                 return self._list_tables()
             elif operation == "describe_table":
                 return self._describe_table(action.get("table", ""))
+            elif operation == "describe_tables":
+                return self._describe_tables(action.get("tables", []))
             elif operation == "count":
                 return self._count_records(
                     table=action.get("table", ""),
@@ -146,28 +245,37 @@ class DatabaseEnvironment(Environment):
             # Store for reference
             self.state["last_query"] = query
             
-            # Execute the query
-            result = conn.execute(text(query), params)
+            # 使用服务端游标流式读取，只有需要返回的行才会传输到客户端；
+            # 固定的批大小让一次往返即可取回所需的行（含判断截断的多读一行）
+            fetch_size = self.arraysize or max_results + 1
+            statement = text(query).execution_options(yield_per=fetch_size)
+            result = conn.execute(statement, params)
+            if result.cursor is not None:
+                # 部分驱动（如Oracle）按arraysize分批从服务端取数
+                result.cursor.arraysize = fetch_size
             
             # Get column names
             columns = result.keys()
             
-            # Fetch results
-            rows = result.fetchmany(max_results)
+            # Fetch results, plus one extra row to tell whether the result was truncated
+            try:
+                rows = result.fetchmany(max_results)
+                truncated = result.fetchone() is not None
+            finally:
+                # 关闭游标，丢弃服务端剩余的结果
+                result.close()
             
             # Convert to list of dicts for easier consumption
-            records = []
-            for row in rows:
-                record = {}
-                for i, column in enumerate(columns):
-                    value = row[i]
-                    # Handle non-serializable types
-                    if isinstance(value, (sqlalchemy.Numeric, sqlalchemy.Integer, sqlalchemy.Float, sqlalchemy.Boolean)):
-                        value = float(value) if isinstance(value, sqlalchemy.Numeric) else value
-                    elif hasattr(value, 'isoformat'):  # datetime-like objects
-                        value = value.isoformat()
-                    record[column] = value
-                records.append(record)
+            records = [dict(zip(columns, row)) for row in rows]
+            
+            # 同一列的值类型一致：按列取第一个非空值判断，只转换日期时间类型的列
+            for i, column in enumerate(columns):
+                sample = next((row[i] for row in rows if row[i] is not None), None)
+                if hasattr(sample, 'isoformat'):  # datetime-like objects
+                    for record in records:
+                        value = record[column]
+                        if value is not None:
+                            record[column] = value.isoformat()
             
             # Store results for reference
             self.state["last_result"] = {
@@ -180,7 +288,7 @@ class DatabaseEnvironment(Environment):
                 "columns": list(columns),
                 "records": records,
                 "record_count": len(records),
-                "truncated": result.rowcount > max_results if result.rowcount >= 0 else None
+                "truncated": truncated
             }
             
         except SQLAlchemyError as e:
@@ -215,6 +323,9 @@ class DatabaseEnvironment(Environment):
             # Get affected rows
             rowcount = result.rowcount
             
+            # 语句可能修改了表结构（CREATE/ALTER/DROP），丢弃缓存的结构信息
+            self._invalidate_schema_cache()
+            
             # Store results for reference
             self.state["last_result"] = {
                 "rowcount": rowcount
@@ -238,7 +349,7 @@ class DatabaseEnvironment(Environment):
             List of tables
         """
         try:
-            inspector = inspect(self.engine)
+            inspector = self._get_inspector()
             
             tables = []
             for table_name in inspector.get_table_names(schema=self.schema):
@@ -271,14 +382,70 @@ class DatabaseEnvironment(Environment):
             return {"success": False, "error": "No table name provided"}
             
         try:
-            inspector = inspect(self.engine)
-            
-            if table not in inspector.get_table_names(schema=self.schema):
+            if table not in self._get_table_names():
                 return {"success": False, "error": f"Table '{table}' not found"}
             
+            return {"success": True, **self._reflect_tables([table])[0]}
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Error describing table {table}: {str(e)}")
+            self.state["last_error"] = str(e)
+            return {"success": False, "error": str(e)}
+
+    def _describe_tables(self, tables: List[str]) -> Dict[str, Any]:
+        """Describe the structure of several tables at once.
+
+        Args:
+            tables: The table names
+
+        Returns:
+            Structure information for each table
+        """
+        if not tables:
+            return {"success": False, "error": "No table names provided"}
+            
+        try:
+            table_names = self._get_table_names()
+            missing = [table for table in tables if table not in table_names]
+            if missing:
+                return {"success": False, "error": f"Tables not found: {', '.join(missing)}"}
+            
+            descriptions = self._reflect_tables(tables)
+            return {
+                "success": True,
+                "tables": descriptions,
+                "count": len(descriptions)
+            }
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Error describing tables {tables}: {str(e)}")
+            self.state["last_error"] = str(e)
+            return {"success": False, "error": str(e)}
+
+    def _reflect_tables(self, tables: List[str]) -> List[Dict[str, Any]]:
+        """Reflect columns, keys and indexes for existing tables.
+
+        Args:
+            tables: The table names
+
+        Returns:
+            One structure description per table, in the given order
+        """
+        inspector = self._get_inspector()
+        
+        # 每类信息用一次schema级查询批量获取，而不是每张表各查一次
+        all_columns = inspector.get_multi_columns(schema=self.schema, filter_names=tables)
+        all_pks = inspector.get_multi_pk_constraint(schema=self.schema, filter_names=tables)
+        all_fks = inspector.get_multi_foreign_keys(schema=self.schema, filter_names=tables)
+        all_indexes = inspector.get_multi_indexes(schema=self.schema, filter_names=tables)
+        
+        descriptions = []
+        for table in dict.fromkeys(tables):
+            key = (self.schema, table)
+            
             # Get columns
             columns = []
-            for column in inspector.get_columns(table, schema=self.schema):
+            for column in all_columns.get(key, []):
                 columns.append({
                     "name": column["name"],
                     "type": str(column["type"]),
@@ -288,11 +455,11 @@ class DatabaseEnvironment(Environment):
                 })
             
             # Get primary key
-            pk = inspector.get_pk_constraint(table, schema=self.schema)
+            pk = all_pks.get(key)
             
             # Get foreign keys
             fks = []
-            for fk in inspector.get_foreign_keys(table, schema=self.schema):
+            for fk in all_fks.get(key, []):
                 fks.append({
                     "name": fk.get("name"),
                     "referred_schema": fk.get("referred_schema"),
@@ -303,27 +470,23 @@ class DatabaseEnvironment(Environment):
             
             # Get indexes
             indexes = []
-            for idx in inspector.get_indexes(table, schema=self.schema):
+            for idx in all_indexes.get(key, []):
                 indexes.append({
                     "name": idx.get("name"),
                     "unique": idx.get("unique", False),
                     "columns": idx.get("column_names", [])
                 })
             
-            return {
-                "success": True,
+            descriptions.append({
                 "table": table,
                 "schema": self.schema,
                 "columns": columns,
                 "primary_key": pk.get("constrained_columns", []) if pk else [],
                 "foreign_keys": fks,
                 "indexes": indexes
-            }
-            
-        except SQLAlchemyError as e:
-            logger.error(f"Error describing table {table}: {str(e)}")
-            self.state["last_error"] = str(e)
-            return {"success": False, "error": str(e)}
+            })
+        
+        return descriptions
 
     def _count_records(self, table: str, condition: str = None) -> Dict[str, Any]:
         """Count records in a table.
@@ -430,6 +593,7 @@ class DatabaseEnvironment(Environment):
             self.connection.close()
             self.connection = None
             
+        self._invalidate_schema_cache()
         self.state = {
             "connected": self.state["connected"],  # Keep connection status
             "last_query": None,
@@ -444,7 +608,8 @@ class DatabaseEnvironment(Environment):
         if self.connection and not self.connection.closed:
             self.connection.close()
             self.connection = None
-            
+        
+        self._release_engine()
         self.state["connected"] = False
         logger.info(f"Closed database connection for environment {self.name}")
         
@@ -2,6 +2,7 @@
 
 import logging
 import re
+import threading
 import time
 from typing import Any, Dict, List, Optional
 import urllib.parse
@@ -51,6 +52,10 @@ class WebEnvironment(Environment):
         self.timeout = timeout
         self.max_retries = max_retries
         self.session = None
+        self.http_session = None
+        # 批量执行时多个线程共用本环境：保护会话的创建以及每次访问后的状态更新
+        self._session_lock = threading.Lock()
+        self._state_lock = threading.Lock()
         
         # State management
         self.state = {
@@ -73,6 +78,17 @@ class WebEnvironment(Environment):
             )
         return self.session
 
+    def get_http_session(self) -> requests.Session:
+        """Get the pooled requests session used by synchronous requests."""
+        if self.http_session is None:
+            with self._session_lock:
+                if self.http_session is None:
+                    # 复用TCP/TLS连接，搜索后连续访问结果页时无需重新建立连接
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    self.http_session = session
+        return self.http_session
+
     async def close_session(self):
         """Close the aiohttp session."""
         if self.session and not self.session.closed:
@@ -94,7 +110,11 @@ class WebEnvironment(Environment):
         
         try:
             if action_type == "visit":
-                return self._visit_url(action.get("url", ""), action.get("parse", True))
+                return self._visit_url(
+                    action.get("url", ""),
+                    action.get("parse", True),
+                    action.get("include_content", False)
+                )
             elif action_type == "extract":
                 return self._extract_content(
                     selector=action.get("selector", ""),
@@ -106,7 +126,9 @@ class WebEnvironment(Environment):
             elif action_type == "search":
                 return self._search(
                     query=action.get("query", ""),
-                    engine=action.get("engine", "google")
+                    engine=action.get("engine", "google"),
+                    parse=action.get("parse", True),
+                    include_content=action.get("include_content", False)
                 )
             elif action_type == "click":
                 return self._click_link(
@@ -127,12 +149,15 @@ class WebEnvironment(Environment):
             self.state["last_error"] = str(e)
             return {"success": False, "error": str(e)}
 
-    def _visit_url(self, url: str, parse: bool = True) -> Dict[str, Any]:
+    def _visit_url(self, url: str, parse: bool = True, include_content: bool = False) -> Dict[str, Any]:
         """Visit a URL and optionally parse the content.
 
         Args:
             url: The URL to visit
             parse: Whether to parse the content as HTML
+            include_content: Whether to return the page text under ``content``,
+                for callers that fetch concurrently and cannot rely on
+                ``state["last_page_content"]``
 
         Returns:
             The page content and metadata
@@ -146,25 +171,16 @@ class WebEnvironment(Environment):
         
         for attempt in range(self.max_retries):
             try:
-                response = requests.get(
+                response = self.get_http_session().get(
                     url=url,
-                    headers=self.headers,
                     timeout=self.timeout
                 )
                 
-                # Update state
-                self.state["current_url"] = url
-                if self.state["current_url"] not in self.state["history"]:
-                    self.state["history"].append(url)
-                self.state["last_page_content"] = response.text
-                self.state["cookies"].update(dict(response.cookies))
-                
                 content_type = response.headers.get("Content-Type", "").lower()
                 is_html = "text/html" in content_type
                 
                 if parse and is_html:
                     soup = BeautifulSoup(response.text, "html.parser")
-                    self.state["last_page_soup"] = soup
                     
                     # Extract key information
                     title = soup.title.text.strip() if soup.title else "No title"
@@ -180,7 +196,7 @@ class WebEnvironment(Environment):
                     # Extract links
                     links = [a.get("href") for a in soup.find_all("a") if a.get("href")]
                     
-                    return {
+                    result = {
                         "success": True,
                         "url": url,
                         "status_code": response.status_code,
@@ -191,8 +207,9 @@ class WebEnvironment(Environment):
                         "content_length": len(response.text)
                     }
                 else:
-                    # Non-HTML content
-                    return {
+                    # Non-HTML content (or parsing skipped); drop the previous page's soup
+                    soup = None
+                    result = {
                         "success": True,
                         "url": url,
                         "status_code": response.status_code,
@@ -200,6 +217,19 @@ class WebEnvironment(Environment):
                         "content_length": len(response.text)
                     }
                 
+                # Update state：一次访问的所有状态在锁内一起更新，并发访问时不会混杂不同页面
+                with self._state_lock:
+                    self.state["current_url"] = url
+                    if url not in self.state["history"]:
+                        self.state["history"].append(url)
+                    self.state["last_page_content"] = response.text
+                    self.state["cookies"].update(dict(response.cookies))
+                    self.state["last_page_soup"] = soup
+                
+                if include_content:
+                    result["content"] = response.text
+                return result
+                
             except requests.RequestException as e:
                 logger.warning(f"Request to {url} failed (attempt {attempt+1}/{self.max_retries}): {str(e)}")
                 time.sleep(1)  # Wait before retrying
@@ -290,12 +320,15 @@ class WebEnvironment(Environment):
         
         return {"success": False, "error": "No previous URL in history"}
 
-    def _search(self, query: str, engine: str = "google") -> Dict[str, Any]:
+    def _search(self, query: str, engine: str = "google", parse: bool = True,
+                include_content: bool = False) -> Dict[str, Any]:
         """Perform a search using a search engine.
 
         Args:
             query: The search query
             engine: The search engine to use
+            parse: Whether to parse the results page as HTML
+            include_content: Whether to return the results page text under ``content``
 
         Returns:
             The search results page
@@ -314,7 +347,7 @@ class WebEnvironment(Environment):
         else:
             return {"success": False, "error": f"Unsupported search engine: {engine}"}
         
-        result = self._visit_url(url)
+        result = self._visit_url(url, parse, include_content)
         
         if result["success"]:
             result["query"] = query
@@ -528,6 +561,13 @@ class WebEnvironment(Environment):
         }
         return self.get_observation()
     
+    def close(self) -> None:
+        """Close the pooled requests session and the environment."""
+        if self.http_session is not None:
+            self.http_session.close()
+            self.http_session = None
+        super().close()
+    
     async def __aenter__(self):
         """Async context manager enter."""
         await self.create_session()
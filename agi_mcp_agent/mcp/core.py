@@ -3,10 +3,10 @@
 import asyncio
 import logging
 import sys
-import traceback
 import time
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 
 from agi_mcp_agent.mcp.models import Agent, Task, SystemLog, SystemStatus
 from agi_mcp_agent.mcp.repository import MCPRepository
@@ -22,29 +22,33 @@ logger = logging.getLogger(__name__)
 class MasterControlProgram:
     """Master Control Program for agent orchestration and task management."""
 
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, preload_llm: bool = True,
+                 pool_options: Optional[Dict[str, Any]] = None):
         """Initialize the MCP.
 
         Args:
             database_url: The database connection URL
+            preload_llm: Whether the LLM service loads providers and models
+                during initialization
+            pool_options: Connection pool settings passed to MCPRepository
+                (pool_size, max_overflow, pool_timeout)
         """
         logger.info("Initializing MasterControlProgram")
         try:
             logger.debug(f"Creating MCPRepository with database URL: {database_url.split('@')[0]}@*****")
-            self.repository = MCPRepository(database_url)
+            self.repository = MCPRepository(database_url, **(pool_options or {}))
             logger.info("Repository initialized successfully")
             
             logger.debug("Initializing LLMService")
             start_time = time.time()
-            self.llm_service = LLMService(self.repository)
+            self.llm_service = LLMService(self.repository, preload=preload_llm)
             logger.info(f"LLMService initialized in {time.time() - start_time:.2f} seconds")
             
             self.running = False
             self._log_system_event("info", "MCP initialized")
             logger.info("MasterControlProgram initialization complete")
         except Exception as e:
-            logger.error(f"Error during MCP initialization: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error during MCP initialization: %s", e)
             raise
 
     def _log_system_event(self, level: str, message: str, metadata: Optional[Dict] = None):
@@ -68,8 +72,7 @@ class MasterControlProgram:
             log_method = getattr(logger, level.lower(), logger.info)
             log_method(f"System event: {message}")
         except Exception as e:
-            logger.error(f"Error logging system event: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error logging system event: %s", e)
 
     async def register_agent(self, agent: Agent) -> Optional[int]:
         """Register an agent with the MCP.
@@ -95,8 +98,7 @@ class MasterControlProgram:
                 logger.warning(f"Failed to register agent: {agent.name}")
                 return None
         except Exception as e:
-            logger.error(f"Error registering agent: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error registering agent: %s", e)
             return None
 
     async def create_task(self, task: Task) -> Optional[int]:
@@ -142,10 +144,35 @@ class MasterControlProgram:
                 logger.warning(f"Failed to add task: {task.name}")
                 return None
         except Exception as e:
-            logger.error(f"Error adding task: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error adding task: %s", e)
             return None
             
+    async def add_tasks(self, tasks: List[Task]) -> List[Task]:
+        """Add several tasks to the system in one database round-trip.
+
+        Args:
+            tasks: The tasks to add
+
+        Returns:
+            The tasks with IDs if successful, an empty list otherwise
+        """
+        logger.info(f"Adding {len(tasks)} tasks")
+        try:
+            created_tasks = await asyncio.to_thread(self.repository.create_tasks, tasks)
+            if created_tasks:
+                logger.info(f"Added {len(created_tasks)} tasks")
+                self._log_system_event(
+                    "info",
+                    f"Added {len(created_tasks)} tasks",
+                    {"task_ids": [t.id for t in created_tasks]}
+                )
+            else:
+                logger.warning(f"Failed to add batch of {len(tasks)} tasks")
+            return created_tasks
+        except Exception as e:
+            logger.exception("Error adding tasks: %s", e)
+            return []
+
     async def get_task(self, task_id: str) -> Optional[Task]:
         """Get a task by ID.
 
@@ -164,7 +191,7 @@ class MasterControlProgram:
                 logger.error(f"Invalid task ID format: {task_id}")
                 return None
                 
-            task = self.repository.get_task(task_id_int)
+            task = await asyncio.to_thread(self.repository.get_task, task_id_int)
             if task:
                 logger.debug(f"Found task: {task.name} (ID: {task.id})")
                 return task
@@ -172,24 +199,26 @@ class MasterControlProgram:
                 logger.warning(f"Task with ID {task_id} not found")
                 return None
         except Exception as e:
-            logger.error(f"Error getting task: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting task: %s", e)
             return None
             
-    async def get_all_tasks(self) -> List[Task]:
+    async def get_all_tasks(self, limit: Optional[int] = None, offset: int = 0) -> List[Task]:
         """Get all tasks.
 
+        Args:
+            limit: Maximum number of tasks to return, None for no limit
+            offset: Number of tasks to skip
+
         Returns:
             List of all tasks
         """
         logger.debug("Getting all tasks")
         try:
-            tasks = self.repository.get_all_tasks()
+            tasks = await asyncio.to_thread(self.repository.get_all_tasks, limit=limit, offset=offset)
             logger.debug(f"Retrieved {len(tasks)} tasks")
             return tasks
         except Exception as e:
-            logger.error(f"Error getting all tasks: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all tasks: %s", e)
             return []
 
     async def update_task_status(self, task_id: int, status: str,
@@ -228,7 +257,8 @@ class MasterControlProgram:
         Returns:
             The current system status
         """
-        return self.repository.get_system_status()
+        # 聚合查询和系统负载采样都是阻塞操作，放到线程池执行
+        return await asyncio.to_thread(self.repository.get_system_status)
 
     # LLM-specific methods
     async def register_llm_provider(self, provider: LLMProvider) -> Optional[int]:
@@ -330,45 +360,80 @@ class MasterControlProgram:
         self._log_system_event("info", "MCP started")
 
         try:
-            # 实现基本的任务调度循环
+            # 实现基本的任务调度循环（数据库调用在线程池中执行，避免阻塞共享的事件循环）
             while self.running:
-                await self._process_task_queue()
+                # 多个工作进程共享同一数据库时，只有持有调度锁的进程分配任务
+                if await asyncio.to_thread(self.repository.hold_scheduler_lock):
+                    await self._process_task_queue()
                 await self._monitor_system_health()
                 await asyncio.sleep(1)  # 调度间隔为1秒
                 
         except asyncio.CancelledError:
             logger.info("MCP task loop cancelled")
         except Exception as e:
-            logger.error(f"Error in MCP main loop: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error in MCP main loop: %s", e)
             self._log_system_event("error", f"MCP main loop error: {str(e)}")
         finally:
             self.running = False
+            await asyncio.to_thread(self.repository.release_scheduler_lock)
             self._log_system_event("info", "MCP stopped")
 
     async def _process_task_queue(self):
-        """处理任务队列，实现任务调度和代理分配逻辑"""
+        """处理任务队列，实现任务调度和代理分配逻辑
+
+        A task whose ``input_data`` contains ``required_capability`` is only
+        assigned to an agent that declares that capability (as a key of its
+        ``capabilities`` mapping or an entry of a list). If no available agent
+        has it, the task stays pending and is retried on the next pass. Tasks
+        without the key go to the next free agent.
+        """
         try:
             # 获取待处理的任务
-            pending_tasks = self.repository.get_tasks_by_status("pending")
+            pending_tasks = await asyncio.to_thread(self.repository.get_tasks_by_status, "pending")
             if not pending_tasks:
                 return
 
             # 获取可用的代理
-            available_agents = self.repository.get_available_agents()
+            available_agents = await asyncio.to_thread(self.repository.get_available_agents)
             if not available_agents:
                 logger.debug("No available agents for task assignment")
                 return
 
-            # 简单的轮询调度算法
-            for i, task in enumerate(pending_tasks[:len(available_agents)]):
-                agent = available_agents[i % len(available_agents)]
+            # 本轮调度的代理索引：id -> 代理，能力 -> 代理 id 集合
+            agents_by_id = {agent.id: agent for agent in available_agents}
+            agents_by_capability: Dict[str, Set[int]] = defaultdict(set)
+            for agent in available_agents:
+                for capability in self._agent_capabilities(agent):
+                    agents_by_capability[capability].add(agent.id)
+
+            for task in pending_tasks:
+                if not agents_by_id:
+                    break
+
+                # 声明了所需能力的任务只需一次集合查找；否则按顺序取空闲代理
+                required = (task.input_data or {}).get("required_capability")
+                if required:
+                    candidates = agents_by_capability.get(required)
+                    if not candidates:
+                        logger.debug(
+                            f"No available agent with capability {required!r} for task {task.id}; "
+                            "leaving it pending"
+                        )
+                        continue
+                    agent_id = min(candidates)
+                else:
+                    agent_id = next(iter(agents_by_id))
+
+                agent = agents_by_id.pop(agent_id)
+                for capability in self._agent_capabilities(agent):
+                    agents_by_capability[capability].discard(agent_id)
                 
                 # 分配任务给代理
-                success = self.repository.assign_task_to_agent(task.id, agent.id)
+                success = await asyncio.to_thread(self.repository.assign_task_to_agent, task.id, agent.id)
                 if success:
                     logger.info(f"Assigned task {task.id} to agent {agent.id}")
-                    self._log_system_event(
+                    await asyncio.to_thread(
+                        self._log_system_event,
                         "info", 
                         f"Task assigned: {task.name} to agent {agent.name}",
                         {"task_id": task.id, "agent_id": agent.id}
@@ -377,18 +442,34 @@ class MasterControlProgram:
                     logger.warning(f"Failed to assign task {task.id} to agent {agent.id}")
 
         except Exception as e:
-            logger.error(f"Error in task queue processing: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error in task queue processing: %s", e)
+
+    @staticmethod
+    def _agent_capabilities(agent: Agent) -> List[str]:
+        """Return the capability names declared by an agent.
+
+        Args:
+            agent: The agent to inspect
+
+        Returns:
+            Capability names, from either a list or the keys of a mapping
+        """
+        capabilities = agent.capabilities
+        if isinstance(capabilities, dict):
+            return list(capabilities)
+        if isinstance(capabilities, (list, tuple, set)):
+            return [str(capability) for capability in capabilities]
+        return []
 
     async def _monitor_system_health(self):
         """监控系统健康状态"""
         try:
             # 检查代理状态
-            agents = self.repository.get_all_agents()
+            agents = await asyncio.to_thread(self.repository.get_all_agents)
             active_agents = [agent for agent in agents if agent.status == "active"]
             
             # 检查任务状态
-            all_tasks = self.repository.get_all_tasks()
+            all_tasks = await asyncio.to_thread(self.repository.get_all_tasks)
             running_tasks = [task for task in all_tasks if task.status == "running"]
             
             # 计算系统负载（简单实现）
@@ -399,15 +480,15 @@ class MasterControlProgram:
 
             # 如果系统负载过高，记录警告
             if system_load > 5.0:  # 每个代理平均超过5个任务
-                self._log_system_event(
+                await asyncio.to_thread(
+                    self._log_system_event,
                     "warning", 
                     f"High system load detected: {system_load:.2f}",
                     {"system_load": system_load, "active_agents": len(active_agents), "running_tasks": len(running_tasks)}
                 )
 
         except Exception as e:
-            logger.error(f"Error in system health monitoring: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error in system health monitoring: %s", e)
 
     async def stop(self):
         """Stop the MCP."""
@@ -416,20 +497,23 @@ class MasterControlProgram:
         self._log_system_event("info", "MCP stopped")
         logger.info("MCP has been stopped")
 
-    async def get_all_agents(self) -> List[Agent]:
+    async def get_all_agents(self, limit: Optional[int] = None, offset: int = 0) -> List[Agent]:
         """Get all agents.
 
+        Args:
+            limit: Maximum number of agents to return, None for no limit
+            offset: Number of agents to skip
+
         Returns:
             List of all agents
         """
         logger.debug("Getting all agents")
         try:
-            agents = self.repository.get_all_agents()
+            agents = await asyncio.to_thread(self.repository.get_all_agents, limit=limit, offset=offset)
             logger.debug(f"Retrieved {len(agents)} agents")
             return agents
         except Exception as e:
-            logger.error(f"Error getting all agents: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all agents: %s", e)
             return []
 
     async def unregister_agent(self, agent_id: int) -> bool:
@@ -443,26 +527,19 @@ class MasterControlProgram:
         """
         logger.info(f"Unregistering agent with ID: {agent_id}")
         try:
-            # Try to get the agent to confirm it exists
-            agent = self.repository.get_agent(agent_id)
-            if not agent:
-                logger.warning(f"Cannot unregister agent {agent_id}: not found")
-                return False
-                
-            # Delete the agent from the database
-            success = self.repository.delete_agent(agent_id)
-            if success:
+            # Delete the agent from the database; None means it did not exist
+            agent_name = await asyncio.to_thread(self.repository.delete_agent, agent_id)
+            if agent_name is not None:
                 logger.info(f"Agent {agent_id} unregistered successfully")
                 self._log_system_event(
                     "info",
-                    f"Unregistered agent {agent.name}",
+                    f"Unregistered agent {agent_name}",
                     {"agent_id": agent_id}
                 )
                 return True
             else:
-                logger.warning(f"Failed to unregister agent {agent_id}")
+                logger.warning(f"Cannot unregister agent {agent_id}: not found or could not be deleted")
                 return False
         except Exception as e:
-            logger.error(f"Error unregistering agent: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error unregistering agent: %s", e)
             return False 
\ No newline at end of file
@@ -1,5 +1,6 @@
 """LLM (Large Language Model) configuration models for MCP."""
 
+from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 from pydantic import BaseModel, Field, validator
 
@@ -35,6 +36,7 @@ class LLMModel(BaseModel):
     params: Dict[str, Any]  # Model-specific parameters
     status: str = "enabled"
     metadata: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
 
     @validator('capability')
     def validate_capability(cls, v):
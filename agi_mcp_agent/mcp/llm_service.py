@@ -1,15 +1,15 @@
 """LLM (Large Language Model) service layer."""
 
+import asyncio
 import logging
 import uuid
-import traceback
 import sys
 import time
 import json
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Set, Union
 import openai
 import anthropic
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -32,11 +32,16 @@ class DateTimeEncoder(json.JSONEncoder):
 class LLMService:
     """Service for handling LLM operations."""
 
-    def __init__(self, repository: MCPRepository):
+    def __init__(self, repository: MCPRepository, preload: bool = True,
+                 provider_cache_ttl: float = 60.0):
         """Initialize the LLM service.
 
         Args:
             repository: The MCP repository instance
+            preload: Whether to load providers and models immediately; when
+                False, call preload_providers() later
+            provider_cache_ttl: Seconds a cached provider is served by
+                get_provider() before it is re-read from the database
         """
         logger.info("Initializing LLMService")
         start_time = time.time()
@@ -45,6 +50,16 @@ class LLMService:
         self._providers: Dict[int, LLMProvider] = {}
         self._models: Dict[int, LLMModel] = {}
         
+        # 提供商读取缓存：记录加载时间，超过TTL后重新从数据库读取
+        self.provider_cache_ttl = provider_cache_ttl
+        self._provider_loaded_at: Dict[int, float] = {}
+        self._provider_cache_hits = 0
+        self._provider_cache_misses = 0
+        
+        if not preload:
+            logger.info("Deferring provider and model loading")
+            return
+        
         # Try to initialize providers and models
         try:
             logger.info("Loading providers and models from database")
@@ -52,8 +67,7 @@ class LLMService:
             logger.info(f"Initialized LLMService in {time.time() - start_time:.2f} seconds")
             logger.info(f"Loaded {len(self._providers)} providers and {len(self._models)} models")
         except Exception as e:
-            logger.error(f"Failed to initialize LLMService: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Failed to initialize LLMService: %s", e)
             # Continue with empty collections
             self._providers = {}
             self._models = {}
@@ -130,16 +144,16 @@ class LLMService:
                         )
                         logger.debug(f"Added provider {provider_name} to service")
                     except Exception as e:
-                        logger.error(f"Error loading provider: {str(e)}")
-                        logger.error(traceback.format_exc())
+                        logger.exception("Error loading provider: %s", e)
                         continue
                 
+                self._provider_loaded_at = dict.fromkeys(self._providers, time.monotonic())
                 logger.debug(f"Loaded {len(self._providers)} providers, now loading models")
                 
                 # Query for models
                 models_query = text("""
                     SELECT 
-                        id, provider_id, model_name, capability, params, status, metadata
+                        id, provider_id, model_name, capability, params, status, metadata, created_at
                     FROM llm_models
                     WHERE status = 'enabled' OR COALESCE(is_enabled, true) = true
                 """)
@@ -156,6 +170,7 @@ class LLMService:
                         params_data = m[4]
                         status = m[5]
                         metadata = m[6]
+                        created_at = m[7]
                         
                         logger.debug(f"Processing model: {model_name} (ID: {model_id})")
                         
@@ -198,24 +213,34 @@ class LLMService:
                             capability=capability,
                             params=model_params,
                             status=status,
-                            metadata=model_metadata
+                            metadata=model_metadata,
+                            created_at=created_at
                         )
                         logger.debug(f"Added model {model_name} to service")
                     except Exception as e:
-                        logger.error(f"Error loading model: {str(e)}")
-                        logger.error(traceback.format_exc())
+                        logger.exception("Error loading model: %s", e)
                         continue
                 
                 logger.info(f"Loaded {len(self._providers)} providers and {len(self._models)} models")
                 
             except Exception as e:
-                logger.error(f"Error loading providers and models: {str(e)}")
-                logger.error(traceback.format_exc())
+                logger.exception("Error loading providers and models: %s", e)
                 # Don't let initialization failure crash the service
                 # Just continue with empty collections
                 self._providers = {}
                 self._models = {}
 
+    async def preload_providers(self) -> int:
+        """Load providers and models from the database without blocking the event loop.
+
+        Returns:
+            The number of providers loaded
+        """
+        start_time = time.time()
+        await asyncio.to_thread(self._load_providers_and_models)
+        logger.info(f"Preloaded LLM providers and models in {time.time() - start_time:.2f} seconds")
+        return len(self._providers)
+
     def _convert_list_to_pg_array(self, python_list: List) -> str:
         """Convert a Python list to a PostgreSQL array literal.
         
@@ -288,11 +313,10 @@ class LLMService:
                 
                 if result:
                     provider.id = result[0]
-                    self._providers[provider.id] = provider
+                    self._cache_provider(provider)
                     return provider.id
         except Exception as e:
-            logger.error(f"Error creating provider: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error creating provider: %s", e)
         return None
 
     async def create_model(self, model: LLMModel) -> Optional[int]:
@@ -317,7 +341,7 @@ class LLMService:
                 query = text("""
                     INSERT INTO llm_models (provider_id, model_name, capability, params, status, metadata)
                     VALUES (:provider_id, :model_name, :capability, :params, :status, :metadata)
-                    RETURNING id
+                    RETURNING id, created_at
                 """)
                 result = session.execute(
                     query,
@@ -334,11 +358,11 @@ class LLMService:
                 
                 if result:
                     model.id = result[0]
+                    model.created_at = result[1]
                     self._models[model.id] = model
                     return model.id
         except Exception as e:
-            logger.error(f"Error creating model: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error creating model: %s", e)
         return None
 
     async def generate_completion(self, request: LLMRequest) -> Optional[LLMResponse]:
@@ -406,8 +430,7 @@ class LLMService:
                 raise ValueError(f"Unsupported provider type: {provider.type}")
 
         except Exception as e:
-            logger.error(f"Error generating completion: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error generating completion: %s", e)
             return None
 
     async def generate_embeddings(self, request: LLMEmbeddingRequest) -> Optional[LLMEmbeddingResponse]:
@@ -447,13 +470,22 @@ class LLMService:
                 raise ValueError(f"Unsupported provider type for embeddings: {provider.type}")
 
         except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error generating embeddings: %s", e)
             return None
 
     async def get_all_providers(self) -> List[LLMProvider]:
         """Get all LLM providers.
 
+        The query runs in a worker thread so it can overlap with other lookups.
+
+        Returns:
+            List of all LLM providers
+        """
+        return await asyncio.to_thread(self._fetch_providers)
+
+    def _fetch_providers(self) -> List[LLMProvider]:
+        """Query all LLM providers (blocking).
+
         Returns:
             List of all LLM providers
         """
@@ -514,24 +546,41 @@ class LLMService:
                 
                 return providers
         except Exception as e:
-            logger.error(f"Error getting all providers: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all providers: %s", e)
             return []
 
-    async def get_all_models(self) -> List[LLMModel]:
+    async def get_all_models(self, limit: Optional[int] = None, offset: int = 0) -> List[LLMModel]:
         """Get all LLM models.
 
+        The query runs in a worker thread so it does not block the event loop.
+
+        Args:
+            limit: Maximum number of models to return, None for no limit
+            offset: Number of models to skip
+
         Returns:
             List of all LLM models
         """
+        return await asyncio.to_thread(self._fetch_models, limit, offset)
+
+    def _fetch_models(self, limit: Optional[int], offset: int) -> List[LLMModel]:
+        """Query a page of LLM models (blocking).
+
+        Args:
+            limit: Maximum number of models to return, None for no limit
+            offset: Number of models to skip
+
+        Returns:
+            List of LLM models
+        """
         try:
             with self.repository._get_session() as session:
-                query = text("""
-                    SELECT id, provider_id, model_name, capability, params, status, metadata
+                query, params = self.repository._paginate("""
+                    SELECT id, provider_id, model_name, capability, params, status, metadata, created_at
                     FROM llm_models
-                    ORDER BY model_name
-                """)
-                results = session.execute(query).fetchall()
+                    ORDER BY model_name, id
+                """, limit, offset)
+                results = session.execute(text(query), params).fetchall()
                 
                 models = []
                 for result in results:
@@ -543,6 +592,7 @@ class LLMService:
                     params_data = result[4]
                     status = result[5]
                     metadata = result[6]
+                    created_at = result[7]
                     
                     # Parse params
                     model_params = {}
@@ -574,19 +624,32 @@ class LLMService:
                         capability=capability,
                         params=model_params,
                         status=status,
-                        metadata=model_metadata
+                        metadata=model_metadata,
+                        created_at=created_at
                     )
                     models.append(model)
                 
                 return models
         except Exception as e:
-            logger.error(f"Error getting all models: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all models: %s", e)
             return []
 
     async def get_models_by_provider(self, provider_id: int) -> List[LLMModel]:
         """Get models for a specific provider.
 
+        The query runs in a worker thread so concurrent lookups can overlap.
+
+        Args:
+            provider_id: The provider ID
+
+        Returns:
+            List of models for the provider
+        """
+        return await asyncio.to_thread(self._fetch_models_by_provider, provider_id)
+
+    def _fetch_models_by_provider(self, provider_id: int) -> List[LLMModel]:
+        """Query the models for a specific provider (blocking).
+
         Args:
             provider_id: The provider ID
 
@@ -596,7 +659,7 @@ class LLMService:
         try:
             with self.repository._get_session() as session:
                 query = text("""
-                    SELECT id, provider_id, model_name, capability, params, status, metadata
+                    SELECT id, provider_id, model_name, capability, params, status, metadata, created_at
                     FROM llm_models
                     WHERE provider_id = :provider_id
                     ORDER BY model_name
@@ -613,6 +676,7 @@ class LLMService:
                     params_data = result[4]
                     status = result[5]
                     metadata = result[6]
+                    created_at = result[7]
                     
                     # Parse params
                     model_params = {}
@@ -644,16 +708,68 @@ class LLMService:
                         capability=capability,
                         params=model_params,
                         status=status,
-                        metadata=model_metadata
+                        metadata=model_metadata,
+                        created_at=created_at
                     )
                     models.append(model)
                 
                 return models
         except Exception as e:
-            logger.error(f"Error getting models by provider: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting models by provider: %s", e)
             return []
 
+    async def count_models(self) -> int:
+        """Count all LLM models.
+
+        The query runs in a worker thread so it does not block the event loop.
+
+        Returns:
+            The number of models
+        """
+        return await asyncio.to_thread(self._fetch_model_count)
+
+    def _fetch_model_count(self) -> int:
+        """Query the number of LLM models (blocking).
+
+        Returns:
+            The number of models
+        """
+        try:
+            with self.repository._get_session() as session:
+                return session.execute(text("SELECT COUNT(*) FROM llm_models")).scalar() or 0
+        except Exception as e:
+            logger.exception("Error counting models: %s", e)
+            return 0
+
+    async def get_model_counts_by_provider(self) -> Dict[int, int]:
+        """Get the number of models registered for each provider.
+
+        The query runs in a worker thread so concurrent lookups can overlap.
+
+        Returns:
+            Mapping of provider ID to model count
+        """
+        return await asyncio.to_thread(self._fetch_model_counts)
+
+    def _fetch_model_counts(self) -> Dict[int, int]:
+        """Query the number of models registered for each provider (blocking).
+
+        Returns:
+            Mapping of provider ID to model count
+        """
+        try:
+            with self.repository._get_session() as session:
+                query = text("""
+                    SELECT provider_id, COUNT(*)
+                    FROM llm_models
+                    GROUP BY provider_id
+                """)
+                results = session.execute(query).fetchall()
+                return {row[0]: row[1] for row in results}
+        except Exception as e:
+            logger.exception("Error getting model counts by provider: %s", e)
+            return {}
+
     async def get_provider(self, provider_id: int) -> Optional[LLMProvider]:
         """Get a provider by ID.
 
@@ -664,73 +780,185 @@ class LLMService:
             The provider, if found
         """
         # First check in-memory cache
-        if provider_id in self._providers:
-            return self._providers[provider_id]
+        cached = self._get_cached_provider(provider_id)
+        if cached is not None:
+            return cached
             
         try:
-            with self.repository._get_session() as session:
-                query = text("""
-                    SELECT id, name, type, api_key, models, status, metadata
-                    FROM llm_providers
-                    WHERE id = :id
-                """)
-                result = session.execute(query, {"id": provider_id}).fetchone()
-                
-                if not result:
-                    return None
-                    
-                # Extract fields
-                provider_id = result[0]
-                name = result[1]
-                provider_type = result[2]
-                api_key = result[3]
-                models_data = result[4]
-                status = result[5]
-                metadata = result[6]
-                
-                # Parse models list
-                provider_models = []
-                if models_data:
-                    if isinstance(models_data, list):
-                        provider_models = models_data
-                    elif isinstance(models_data, str):
-                        try:
-                            provider_models = json.loads(models_data)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse models JSON for provider {provider_id}")
-                            provider_models = []
-                
-                # Parse metadata
-                provider_metadata = {}
-                if metadata:
-                    if isinstance(metadata, str):
-                        try:
-                            provider_metadata = json.loads(metadata)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse metadata JSON for provider {provider_id}")
-                    elif isinstance(metadata, dict):
-                        provider_metadata = metadata
-                
-                # Create provider object
-                provider = LLMProvider(
-                    id=provider_id,
-                    name=name,
-                    type=provider_type,
-                    api_key=api_key,
-                    models=provider_models,
-                    status=status,
-                    metadata=provider_metadata
-                )
-                
-                # Add to in-memory cache
-                self._providers[provider_id] = provider
-                
-                return provider
+            # 在线程池中查询，允许多个查询并发执行
+            result = await asyncio.to_thread(self._fetch_provider_row, provider_id)
+            if not result:
+                return None
+            
+            provider = self._provider_from_row(result)
+            
+            # Add to in-memory cache
+            self._cache_provider(provider)
+            
+            return provider
         except Exception as e:
-            logger.error(f"Error getting provider: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting provider: %s", e)
             return None
 
+    def _get_cached_provider(self, provider_id: int) -> Optional[LLMProvider]:
+        """Return a cached provider if it is younger than the cache TTL.
+
+        Args:
+            provider_id: The provider ID
+
+        Returns:
+            The cached provider, or None on a miss or expired entry
+        """
+        loaded_at = self._provider_loaded_at.get(provider_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.provider_cache_ttl:
+            provider = self._providers.get(provider_id)
+            if provider is not None:
+                self._provider_cache_hits += 1
+                return provider
+        self._provider_cache_misses += 1
+        return None
+
+    def _cache_provider(self, provider: LLMProvider) -> None:
+        """Store a provider in the in-memory cache and reset its TTL.
+
+        Args:
+            provider: The provider to cache
+        """
+        self._providers[provider.id] = provider
+        self._provider_loaded_at[provider.id] = time.monotonic()
+
+    def invalidate_provider(self, provider_id: Optional[int] = None) -> None:
+        """Force the next lookup of a provider to re-read the database.
+
+        Args:
+            provider_id: The provider to invalidate, or None for all providers
+        """
+        if provider_id is None:
+            self._provider_loaded_at.clear()
+        else:
+            self._provider_loaded_at.pop(provider_id, None)
+
+    def provider_cache_stats(self) -> Dict[str, Any]:
+        """Get provider cache statistics.
+
+        Returns:
+            Hit/miss counters, hit rate and cache size
+        """
+        total = self._provider_cache_hits + self._provider_cache_misses
+        return {
+            "hits": self._provider_cache_hits,
+            "misses": self._provider_cache_misses,
+            "hit_rate": self._provider_cache_hits / total if total else 0.0,
+            "size": len(self._provider_loaded_at),
+            "ttl": self.provider_cache_ttl,
+        }
+
+    def _fetch_provider_row(self, provider_id: int):
+        """Query a single llm_providers row (blocking).
+
+        Args:
+            provider_id: The provider ID
+
+        Returns:
+            The row, or None if not found
+        """
+        with self.repository._get_session() as session:
+            query = text("""
+                SELECT id, name, type, api_key, models, status, metadata
+                FROM llm_providers
+                WHERE id = :id
+            """)
+            return session.execute(query, {"id": provider_id}).fetchone()
+
+    def _provider_from_row(self, row) -> LLMProvider:
+        """Build a provider from an llm_providers row.
+
+        Args:
+            row: Row of (id, name, type, api_key, models, status, metadata)
+
+        Returns:
+            The provider
+        """
+        provider_id, name, provider_type, api_key, models_data, status, metadata = row
+
+        provider_models = []
+        if isinstance(models_data, list):
+            provider_models = models_data
+        elif isinstance(models_data, str) and models_data:
+            try:
+                provider_models = json.loads(models_data)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to parse models JSON for provider {provider_id}")
+
+        provider_metadata = {}
+        if isinstance(metadata, dict):
+            provider_metadata = metadata
+        elif isinstance(metadata, str) and metadata:
+            try:
+                provider_metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to parse metadata JSON for provider {provider_id}")
+
+        return LLMProvider(
+            id=provider_id,
+            name=name,
+            type=provider_type,
+            api_key=api_key,
+            models=provider_models,
+            status=status,
+            metadata=provider_metadata
+        )
+
+    async def get_providers_by_ids(self, provider_ids) -> List[LLMProvider]:
+        """Get several providers with at most one database query.
+
+        Args:
+            provider_ids: The provider IDs to fetch
+
+        Returns:
+            The providers that were found
+        """
+        providers = []
+        missing = []
+        for provider_id in set(provider_ids):
+            cached = self._get_cached_provider(provider_id)
+            if cached is not None:
+                providers.append(cached)
+            else:
+                missing.append(provider_id)
+
+        if not missing:
+            return providers
+
+        try:
+            results = await asyncio.to_thread(self._fetch_provider_rows, missing)
+            for result in results:
+                provider = self._provider_from_row(result)
+                # Add to in-memory cache
+                self._cache_provider(provider)
+                providers.append(provider)
+        except Exception as e:
+            logger.exception("Error getting providers by IDs: %s", e)
+
+        return providers
+
+    def _fetch_provider_rows(self, provider_ids: List[int]):
+        """Fetch several provider rows in one query (runs in a worker thread).
+
+        Args:
+            provider_ids: The provider IDs
+
+        Returns:
+            The matching rows
+        """
+        with self.repository._get_session() as session:
+            query = text("""
+                SELECT id, name, type, api_key, models, status, metadata
+                FROM llm_providers
+                WHERE id IN :ids
+            """).bindparams(bindparam("ids", expanding=True))
+            return session.execute(query, {"ids": provider_ids}).fetchall()
+
     async def get_model(self, model_id: int) -> Optional[LLMModel]:
         """Get a model by ID.
 
@@ -747,7 +975,7 @@ class LLMService:
         try:
             with self.repository._get_session() as session:
                 query = text("""
-                    SELECT id, provider_id, model_name, capability, params, status, metadata
+                    SELECT id, provider_id, model_name, capability, params, status, metadata, created_at
                     FROM llm_models
                     WHERE id = :id
                 """)
@@ -764,6 +992,7 @@ class LLMService:
                 params_data = result[4]
                 status = result[5]
                 metadata = result[6]
+                created_at = result[7]
                 
                 # Parse params
                 model_params = {}
@@ -795,7 +1024,8 @@ class LLMService:
                     capability=capability,
                     params=model_params,
                     status=status,
-                    metadata=model_metadata
+                    metadata=model_metadata,
+                    created_at=created_at
                 )
                 
                 # Add to in-memory cache
@@ -803,8 +1033,7 @@ class LLMService:
                 
                 return model
         except Exception as e:
-            logger.error(f"Error getting model: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting model: %s", e)
             return None
 
     async def delete_provider(self, provider_id: int) -> bool:
@@ -836,16 +1065,15 @@ class LLMService:
                 session.commit()
                 
                 # Remove from in-memory cache
-                if provider_id in self._providers:
-                    del self._providers[provider_id]
+                self._providers.pop(provider_id, None)
+                self.invalidate_provider(provider_id)
                 
                 # Remove associated models from in-memory cache
                 self._models = {k: v for k, v in self._models.items() if v.provider_id != provider_id}
                 
                 return True
         except Exception as e:
-            logger.error(f"Error deleting provider: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error deleting provider: %s", e)
             return False
 
     async def delete_model(self, model_id: int) -> bool:
@@ -878,6 +1106,84 @@ class LLMService:
                 
                 return True
         except Exception as e:
-            logger.error(f"Error deleting model: {e}")
-            logger.error(traceback.format_exc())
-            return False 
\ No newline at end of file
+            logger.exception("Error deleting model: %s", e)
+            return False 
+
+class ProviderLoader:
+    """Request-scoped loader that coalesces provider lookups into batched queries.
+
+    Every ``load`` awaited within the same event-loop iteration is collected
+    and resolved by a single ``get_providers_by_ids`` call. Results are
+    memoized for the lifetime of the loader.
+    """
+
+    def __init__(self, llm_service: LLMService):
+        """Initialize the loader.
+
+        Args:
+            llm_service: The service used to fetch providers
+        """
+        self.llm_service = llm_service
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._loaded: Dict[int, asyncio.Future] = {}
+        self._flush_scheduled = False
+        # 进行中的批量查询任务持有强引用，避免任务在完成前被垃圾回收
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def load(self, provider_id: int) -> Optional[LLMProvider]:
+        """Load a provider, batching with other loads issued in the same tick.
+
+        Args:
+            provider_id: The provider ID
+
+        Returns:
+            The provider if found, None otherwise
+        """
+        future = self._loaded.get(provider_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._loaded[provider_id] = future
+            self._pending[provider_id] = future
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                # 等当前轮次的其他load调用都入队后再统一查询
+                asyncio.get_running_loop().call_soon(self._schedule_flush)
+        return await future
+
+    async def load_many(self, provider_ids) -> List[Optional[LLMProvider]]:
+        """Load several providers with at most one batched query.
+
+        Args:
+            provider_ids: The provider IDs
+
+        Returns:
+            The providers in the same order, None for IDs that were not found
+        """
+        return await asyncio.gather(*(self.load(pid) for pid in provider_ids))
+
+    def _schedule_flush(self) -> None:
+        """Start the batched query for all pending loads."""
+        pending = self._pending
+        self._pending = {}
+        self._flush_scheduled = False
+        task = asyncio.ensure_future(self._flush(pending))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, pending: Dict[int, asyncio.Future]) -> None:
+        """Fetch all pending providers and resolve their futures.
+
+        Args:
+            pending: Futures keyed by provider ID
+        """
+        try:
+            providers = await self.llm_service.get_providers_by_ids(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_id = {p.id: p for p in providers}
+        for provider_id, future in pending.items():
+            if not future.done():
+                future.set_result(by_id.get(provider_id))
@@ -26,6 +26,7 @@ class Task(BaseModel):
     priority: int = Field(default=5, ge=1, le=10)
     agent_id: Optional[int] = None
     parent_task_id: Optional[int] = None
+    # input_data["required_capability"]限定只分配给声明了该能力的代理
     input_data: Optional[Dict[str, Any]] = None
     output_data: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
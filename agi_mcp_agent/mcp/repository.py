@@ -1,18 +1,22 @@
 """MCP (Multi-Cloud Platform) repository layer."""
 
+import asyncio
+import itertools
 import logging
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-import traceback
 
 from agi_mcp_agent.mcp.models import Agent, Task, TaskDependency, AgentMetric, SystemLog, SystemStatus
 
 logger = logging.getLogger(__name__)
 
+# 任务调度领导者使用的PostgreSQL会话级咨询锁键，同一数据库上只有一个MCP实例负责分配任务
+SCHEDULER_LOCK_KEY = 0x4D43505F53434844
+
 # 添加一个JSON编码器来处理datetime对象
 class DateTimeEncoder(json.JSONEncoder):
     """JSON编码器，用于处理datetime对象。"""
@@ -45,19 +49,166 @@ def sanitize_for_json(obj):
 class MCPRepository:
     """Repository for MCP database operations."""
 
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, pool_size: int = 5, pool_timeout: float = 2.0,
+                 max_overflow: int = 15):
         """Initialize the repository.
 
         Args:
             database_url: The database connection URL
+            pool_size: Number of connections kept open in the pool
+            pool_timeout: Seconds to wait for a free pooled connection
+            max_overflow: Extra connections allowed beyond ``pool_size`` under load
         """
-        self.engine = create_engine(database_url)
+        self.pool_size = pool_size
+        # 代理/任务数据每次变更后递增，调用方可据此判断缓存是否过期
+        self._data_versions = itertools.count(1)
+        self.data_version = 0
+        engine_kwargs = {}
+        # SQLite使用的连接池不支持这些参数
+        if not database_url.startswith("sqlite"):
+            engine_kwargs = {
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "pool_timeout": pool_timeout,
+                "pool_pre_ping": True,
+            }
+        self.engine = create_engine(database_url, **engine_kwargs)
         self.Session = sessionmaker(bind=self.engine)
+        # 持有调度锁的专用连接；锁随连接关闭自动释放
+        self._scheduler_conn = None
+
+    async def warm_pool(self, connections: Optional[int] = None) -> int:
+        """Open pooled connections up front so early requests don't pay for them.
+
+        Args:
+            connections: Number of connections to open, defaults to the pool size
+
+        Returns:
+            The number of connections that were opened successfully
+        """
+        count = connections or self.pool_size
+
+        def _open_connection():
+            conn = self.engine.connect()
+            conn.execute(text("SELECT 1"))
+            return conn
+
+        # 同时持有所有连接，确保连接池中建立的是不同的连接
+        results = await asyncio.gather(
+            *(asyncio.to_thread(_open_connection) for _ in range(count)),
+            return_exceptions=True
+        )
+        opened = 0
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to warm database connection: {result}")
+                continue
+            result.close()
+            opened += 1
+        logger.info(f"Warmed {opened}/{count} database connections")
+        return opened
+
+    def _mark_changed(self) -> None:
+        """Record that agent or task data was modified."""
+        # next()在GIL下是原子操作，多个工作线程同时提交也不会得到相同的版本号
+        self.data_version = next(self._data_versions)
+
+    def hold_scheduler_lock(self) -> bool:
+        """Acquire or confirm the scheduler lock shared by all MCP processes.
+
+        With several workers or replicas on one database, only the holder of
+        this PostgreSQL advisory lock dispatches tasks. The lock lives on a
+        dedicated connection, so it is released if the holding process dies
+        and another process takes over on its next call.
+
+        Returns:
+            Whether this process holds the lock
+        """
+        if self.engine.dialect.name != "postgresql":
+            # 非PostgreSQL数据库（如SQLite）只会被单个进程使用
+            return True
+        if self._scheduler_conn is not None:
+            try:
+                self._scheduler_conn.execute(text("SELECT 1"))
+                self._scheduler_conn.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"Lost scheduler lock connection: {e}")
+                self._close_scheduler_conn()
+        conn = None
+        try:
+            conn = self.engine.connect()
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+            ).scalar()
+            # 提交以免连接长期处于事务中；会话级锁不受事务结束影响
+            conn.commit()
+        except Exception as e:
+            logger.exception("Error acquiring scheduler lock: %s", e)
+            if conn is not None:
+                conn.close()
+            return False
+        if not acquired:
+            conn.close()
+            return False
+        self._scheduler_conn = conn
+        logger.info("Acquired scheduler lock, this process now dispatches tasks")
+        return True
+
+    def release_scheduler_lock(self) -> None:
+        """Release the scheduler lock if this process holds it."""
+        if self._scheduler_conn is None:
+            return
+        try:
+            self._scheduler_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+            )
+            self._scheduler_conn.commit()
+        except Exception as e:
+            logger.warning(f"Error releasing scheduler lock: {e}")
+        self._close_scheduler_conn()
+
+    def _close_scheduler_conn(self) -> None:
+        """Close the connection holding the scheduler lock."""
+        try:
+            self._scheduler_conn.close()
+        except Exception:
+            pass
+        self._scheduler_conn = None
+
+    def dispose(self) -> None:
+        """Close all pooled database connections."""
+        self.release_scheduler_lock()
+        self.engine.dispose()
+        logger.info("Database connection pool disposed")
 
     def _get_session(self):
         """Get a new database session."""
         return self.Session()
 
+    def _paginate(self, query: str, limit: Optional[int], offset: int) -> Tuple[str, Dict[str, int]]:
+        """Append LIMIT/OFFSET to a list query, leaving them out when not requested.
+
+        Args:
+            query: The SQL query to paginate
+            limit: Maximum number of rows to return, None for no limit
+            offset: Number of rows to skip
+
+        Returns:
+            The paginated query and its bind parameters
+        """
+        params = {}
+        if limit is not None:
+            query += " LIMIT :limit"
+            params["limit"] = limit
+        elif offset and self.engine.dialect.name == "sqlite":
+            # SQLite不接受LIMIT NULL，且OFFSET必须跟在LIMIT之后；-1表示不限制
+            query += " LIMIT -1"
+        if offset:
+            query += " OFFSET :offset"
+            params["offset"] = offset
+        return query, params
+
     # Agent operations
     def create_agent(self, agent: Agent) -> Optional[Agent]:
         """Create a new agent.
@@ -94,6 +245,7 @@ class MCPRepository:
                     }
                 ).fetchone()
                 session.commit()
+                self._mark_changed()
                 
                 if result:
                     agent.id = result[0]
@@ -151,26 +303,76 @@ class MCPRepository:
             logger.error(f"Error getting agent: {e}")
         return None
 
-    def delete_agent(self, agent_id: int) -> bool:
+    def delete_agent(self, agent_id: int) -> Optional[str]:
         """Delete an agent.
 
         Args:
             agent_id: The ID of the agent to delete
 
         Returns:
-            Whether the deletion was successful
+            The name of the deleted agent, or None if it did not exist or
+            could not be deleted
         """
         try:
             with self._get_session() as session:
-                query = text("DELETE FROM mcp_agents WHERE id = :id")
-                result = session.execute(query, {"id": agent_id})
+                # 删除与存在性检查合并为一条语句，无需先查询
+                query = text("DELETE FROM mcp_agents WHERE id = :id RETURNING name")
+                result = session.execute(query, {"id": agent_id}).fetchone()
                 session.commit()
-                return True
+                if result is None:
+                    return None
+                self._mark_changed()
+                return result[0]
         except Exception as e:
             logger.error(f"Error deleting agent: {e}")
-            return False
+            return None
 
     # Task operations
+    # 与 _task_from_row / _agent_from_row 的下标顺序一致
+    _TASK_COLUMNS = """id, name, description, status, priority, agent_id,
+                           parent_task_id, input_data, output_data, error_message,
+                           created_at, started_at, completed_at"""
+    _AGENT_COLUMNS = "id, name, type, capabilities, status, metadata, created_at, updated_at"
+
+    _INSERT_TASK_QUERY = text("""
+        INSERT INTO mcp_tasks (
+            name, description, status, priority, agent_id,
+            parent_task_id, input_data, output_data, error_message
+        )
+        VALUES (
+            :name, :description, :status, :priority, :agent_id,
+            :parent_task_id, :input_data, :output_data, :error_message
+        )
+        RETURNING id, created_at
+    """)
+
+    @staticmethod
+    def _task_insert_params(task: Task) -> Dict[str, Any]:
+        """Build the bind parameters for inserting a task.
+
+        Args:
+            task: The task to insert
+
+        Returns:
+            The bind parameters for ``_INSERT_TASK_QUERY``
+        """
+        # Sanitize data to handle datetime objects
+        sanitized_input_data = sanitize_for_json(task.input_data) if task.input_data else None
+        sanitized_output_data = sanitize_for_json(task.output_data) if task.output_data else None
+
+        # Convert Python dicts to JSON
+        return {
+            "name": task.name,
+            "description": task.description,
+            "status": task.status,
+            "priority": task.priority,
+            "agent_id": task.agent_id,
+            "parent_task_id": task.parent_task_id,
+            "input_data": json.dumps(sanitized_input_data) if sanitized_input_data else None,
+            "output_data": json.dumps(sanitized_output_data) if sanitized_output_data else None,
+            "error_message": task.error_message
+        }
+
     def create_task(self, task: Task) -> Optional[Task]:
         """Create a new task.
 
@@ -182,40 +384,12 @@ class MCPRepository:
         """
         try:
             with self._get_session() as session:
-                # Sanitize data to handle datetime objects
-                sanitized_input_data = sanitize_for_json(task.input_data) if task.input_data else None
-                sanitized_output_data = sanitize_for_json(task.output_data) if task.output_data else None
-                
-                # Convert Python dicts to JSON
-                input_data_json = json.dumps(sanitized_input_data) if sanitized_input_data else None
-                output_data_json = json.dumps(sanitized_output_data) if sanitized_output_data else None
-                
-                query = text("""
-                    INSERT INTO mcp_tasks (
-                        name, description, status, priority, agent_id,
-                        parent_task_id, input_data, output_data, error_message
-                    )
-                    VALUES (
-                        :name, :description, :status, :priority, :agent_id,
-                        :parent_task_id, :input_data, :output_data, :error_message
-                    )
-                    RETURNING id, created_at
-                """)
                 result = session.execute(
-                    query,
-                    {
-                        "name": task.name,
-                        "description": task.description,
-                        "status": task.status,
-                        "priority": task.priority,
-                        "agent_id": task.agent_id,
-                        "parent_task_id": task.parent_task_id,
-                        "input_data": input_data_json,
-                        "output_data": output_data_json,
-                        "error_message": task.error_message
-                    }
+                    self._INSERT_TASK_QUERY,
+                    self._task_insert_params(task)
                 ).fetchone()
                 session.commit()
+                self._mark_changed()
                 
                 if result:
                     task.id = result[0]
@@ -225,6 +399,34 @@ class MCPRepository:
             logger.error(f"Error creating task: {e}")
             return None
 
+    def create_tasks(self, tasks: List[Task]) -> List[Task]:
+        """Create several tasks in a single transaction.
+
+        Args:
+            tasks: The tasks to create
+
+        Returns:
+            The created tasks with IDs, or an empty list if the batch failed
+        """
+        if not tasks:
+            return []
+        try:
+            with self._get_session() as session:
+                # 同一事务内插入，只提交一次，任一失败则整批回滚
+                for task in tasks:
+                    result = session.execute(
+                        self._INSERT_TASK_QUERY,
+                        self._task_insert_params(task)
+                    ).fetchone()
+                    task.id = result[0]
+                    task.created_at = result[1]
+                session.commit()
+                self._mark_changed()
+                return tasks
+        except Exception as e:
+            logger.error(f"Error creating tasks: {e}")
+            return []
+
     def update_task_status(self, task_id: int, status: str, 
                           output_data: Optional[Dict] = None,
                           error_message: Optional[str] = None) -> bool:
@@ -268,6 +470,7 @@ class MCPRepository:
                     }
                 )
                 session.commit()
+                self._mark_changed()
                 return True
         except Exception as e:
             logger.error(f"Error updating task status: {e}")
@@ -280,51 +483,50 @@ class MCPRepository:
         Returns:
             Current system status information
         """
-        with Session(self.engine) as session:
-            # Count tasks by status
-            total_tasks = session.query(TaskDB).count()
-            pending_tasks = session.query(TaskDB).filter(TaskDB.status == "pending").count()
-            running_tasks = session.query(TaskDB).filter(TaskDB.status == "running").count()
-            completed_tasks = session.query(TaskDB).filter(TaskDB.status == "completed").count()
-            failed_tasks = session.query(TaskDB).filter(TaskDB.status == "failed").count()
-            
-            # Count agents by status
-            total_agents = session.query(AgentDB).count()
-            active_agents = session.query(AgentDB).filter(AgentDB.status == "active").count()
-            idle_agents = session.query(AgentDB).filter(AgentDB.status == "idle").count()
-            
-            # 实现实际的系统负载计算
-            system_load = self._calculate_system_load(session)
-            
-            return SystemStatus(
-                total_tasks=total_tasks,
-                pending_tasks=pending_tasks,
-                running_tasks=running_tasks,
-                completed_tasks=completed_tasks,
-                failed_tasks=failed_tasks,
-                total_agents=total_agents,
-                active_agents=active_agents,
-                idle_agents=idle_agents,
-                system_load=system_load
-            )
-
-    def _calculate_system_load(self, session) -> float:
+        with self._get_session() as session:
+            # 一次查询完成所有按状态的计数，避免逐个状态扫描表
+            counts = session.execute(text("""
+                SELECT t.pending, t.running, t.completed, t.failed, a.total, a.active
+                FROM (
+                    SELECT COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                           COUNT(*) FILTER (WHERE status = 'running') AS running,
+                           COUNT(*) FILTER (WHERE status = 'completed') AS completed,
+                           COUNT(*) FILTER (WHERE status = 'failed') AS failed
+                    FROM mcp_tasks
+                ) t, (
+                    SELECT COUNT(*) AS total,
+                           COUNT(*) FILTER (WHERE status = 'active') AS active
+                    FROM mcp_agents
+                ) a
+            """)).one()
+        pending_tasks, running_tasks, completed_tasks, failed_tasks, total_agents, active_agents = counts
+        
+        # 实现实际的系统负载计算
+        system_load = self._calculate_system_load(running_tasks, active_agents)
+        
+        return SystemStatus(
+            pending_tasks=pending_tasks,
+            running_tasks=running_tasks,
+            completed_tasks=completed_tasks,
+            failed_tasks=failed_tasks,
+            total_agents=total_agents,
+            active_agents=active_agents,
+            system_load=system_load
+        )
+
+    def _calculate_system_load(self, running_tasks: int, active_agents: int) -> float:
         """计算实际的系统负载"""
+        # 任务负载率 (运行中的任务数 / 活跃代理数)
+        task_load = running_tasks / max(active_agents, 1)  # 避免除零错误
         try:
             import psutil
             
-            # CPU使用率 (0-1)
-            cpu_percent = psutil.cpu_percent(interval=0.1) / 100.0
+            # CPU使用率 (0-1)，取自上次调用以来的平均值，不阻塞等待采样
+            cpu_percent = psutil.cpu_percent(interval=None) / 100.0
             
             # 内存使用率 (0-1)  
             memory_percent = psutil.virtual_memory().percent / 100.0
             
-            # 任务负载率 (运行中的任务数 / 活跃代理数)
-            running_tasks = session.query(TaskDB).filter(TaskDB.status == "running").count()
-            active_agents = session.query(AgentDB).filter(AgentDB.status == "active").count()
-            
-            task_load = running_tasks / max(active_agents, 1)  # 避免除零错误
-            
             # 综合负载计算：CPU权重0.4，内存权重0.3，任务权重0.3
             system_load = (cpu_percent * 0.4) + (memory_percent * 0.3) + (min(task_load, 1.0) * 0.3)
             
@@ -332,53 +534,187 @@ class MCPRepository:
             
         except ImportError:
             # 如果psutil不可用，使用简化的任务负载计算
-            running_tasks = session.query(TaskDB).filter(TaskDB.status == "running").count()
-            active_agents = session.query(AgentDB).filter(AgentDB.status == "active").count()
-            
-            return running_tasks / max(active_agents, 1)
+            return task_load
         except Exception as e:
             logger.warning(f"Error calculating system load: {str(e)}")
             return 0.0
 
     def get_tasks_by_status(self, status: str) -> List[Task]:
         """获取指定状态的任务列表"""
-        with Session(self.engine) as session:
-            task_dbs = session.query(TaskDB).filter(TaskDB.status == status).all()
-            return [self._db_task_to_model(task_db) for task_db in task_dbs]
+        try:
+            with self._get_session() as session:
+                query = text(f"""
+                    SELECT {self._TASK_COLUMNS}
+                    FROM mcp_tasks
+                    WHERE status = :status
+                    ORDER BY created_at, id
+                """)
+                results = session.execute(query, {"status": status}).fetchall()
+                return [self._task_from_row(result) for result in results]
+        except Exception as e:
+            logger.exception("Error getting tasks with status %s: %s", status, e)
+            return []
 
     def get_available_agents(self) -> List[Agent]:
         """获取可用的代理列表"""
-        with Session(self.engine) as session:
-            agent_dbs = session.query(AgentDB).filter(
-                AgentDB.status.in_(["active", "idle"])
-            ).all()
-            return [self._db_agent_to_model(agent_db) for agent_db in agent_dbs]
+        try:
+            with self._get_session() as session:
+                query = text(f"""
+                    SELECT {self._AGENT_COLUMNS}
+                    FROM mcp_agents
+                    WHERE status IN ('active', 'idle')
+                    ORDER BY id
+                """)
+                results = session.execute(query).fetchall()
+                return [self._agent_from_row(result) for result in results]
+        except Exception as e:
+            logger.exception("Error getting available agents: %s", e)
+            return []
 
     def assign_task_to_agent(self, task_id: int, agent_id: int) -> bool:
         """将任务分配给代理"""
         try:
-            with Session(self.engine) as session:
+            with self._get_session() as session:
                 # 更新任务状态和分配的代理
-                task_db = session.query(TaskDB).filter(TaskDB.id == task_id).first()
-                if not task_db:
+                result = session.execute(
+                    text("""
+                        UPDATE mcp_tasks
+                        SET agent_id = :agent_id, status = 'assigned', started_at = NOW()
+                        WHERE id = :task_id AND status = 'pending'
+                    """),
+                    {"task_id": task_id, "agent_id": agent_id}
+                )
+                # 任务已不是待处理状态（例如已被其他调度进程分配）
+                if result.rowcount == 0:
                     return False
                 
-                task_db.agent_id = agent_id
-                task_db.status = "assigned"
-                task_db.started_at = datetime.utcnow()
-                
                 # 更新代理状态
-                agent_db = session.query(AgentDB).filter(AgentDB.id == agent_id).first()
-                if agent_db:
-                    agent_db.status = "busy"
+                session.execute(
+                    text("UPDATE mcp_agents SET status = 'busy' WHERE id = :agent_id"),
+                    {"agent_id": agent_id}
+                )
                 
                 session.commit()
+                self._mark_changed()
                 return True
                 
         except Exception as e:
             logger.error(f"Error assigning task {task_id} to agent {agent_id}: {str(e)}")
             return False
 
+    # Environment operations
+    def create_environment_record(self, env_id: str, name: str, env_type: str,
+                                  config: Optional[Dict] = None) -> bool:
+        """Persist the definition of an environment.
+
+        Args:
+            env_id: The environment ID
+            name: The environment name
+            env_type: The environment type, e.g. 'api' or 'memory'
+            config: The configuration used to construct the environment
+
+        Returns:
+            Whether the environment was saved
+        """
+        try:
+            with self._get_session() as session:
+                sanitized_config = sanitize_for_json(config) if config else {}
+                query = text("""
+                    INSERT INTO mcp_environments (id, name, type, config)
+                    VALUES (:id, :name, :type, :config)
+                """)
+                session.execute(
+                    query,
+                    {
+                        "id": env_id,
+                        "name": name,
+                        "type": env_type,
+                        "config": json.dumps(sanitized_config)
+                    }
+                )
+                session.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error creating environment record: {e}")
+            return False
+
+    def get_environment_record(self, env_id: str) -> Optional[Dict[str, Any]]:
+        """Get the definition of an environment.
+
+        Args:
+            env_id: The environment ID
+
+        Returns:
+            The environment's id, name, type and config, if found
+        """
+        try:
+            with self._get_session() as session:
+                query = text("""
+                    SELECT id, name, type, config
+                    FROM mcp_environments
+                    WHERE id = :id
+                """)
+                result = session.execute(query, {"id": env_id}).fetchone()
+                return self._environment_record_from_row(result) if result else None
+        except Exception as e:
+            logger.error(f"Error getting environment record {env_id}: {e}")
+            return None
+
+    def get_environment_records(self, limit: Optional[int] = None,
+                                offset: int = 0) -> List[Dict[str, Any]]:
+        """Get the definitions of all environments.
+
+        Args:
+            limit: Maximum number of environments to return, None for no limit
+            offset: Number of environments to skip
+
+        Returns:
+            List of environment definitions, oldest first
+        """
+        try:
+            with self._get_session() as session:
+                query, params = self._paginate("""
+                    SELECT id, name, type, config
+                    FROM mcp_environments
+                    ORDER BY created_at, id
+                """, limit, offset)
+                results = session.execute(text(query), params).fetchall()
+                return [self._environment_record_from_row(result) for result in results]
+        except Exception as e:
+            logger.error(f"Error getting environment records: {e}")
+            return []
+
+    def delete_environment_record(self, env_id: str) -> bool:
+        """Delete the definition of an environment.
+
+        Args:
+            env_id: The environment ID
+
+        Returns:
+            Whether an environment was deleted
+        """
+        try:
+            with self._get_session() as session:
+                query = text("DELETE FROM mcp_environments WHERE id = :id")
+                result = session.execute(query, {"id": env_id})
+                session.commit()
+                return result.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error deleting environment record {env_id}: {e}")
+            return False
+
+    @staticmethod
+    def _environment_record_from_row(row) -> Dict[str, Any]:
+        """Convert an mcp_environments row into a dict."""
+        config = row[3]
+        if config and isinstance(config, str):
+            try:
+                config = json.loads(config)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to decode config JSON for environment {row[0]}")
+                config = {}
+        return {"id": row[0], "name": row[1], "type": row[2], "config": config or {}}
+
     # Logging operations
     def add_system_log(self, log: SystemLog) -> bool:
         """Add a system log entry.
@@ -473,119 +809,143 @@ class MCPRepository:
                     completed_at=result[12]
                 )
         except Exception as e:
-            logger.error(f"Error getting task: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting task: %s", e)
             return None
             
-    def get_all_tasks(self) -> List[Task]:
+    def get_all_tasks(self, limit: Optional[int] = None, offset: int = 0) -> List[Task]:
         """Get all tasks.
 
+        Args:
+            limit: Maximum number of tasks to return, None for no limit
+            offset: Number of tasks to skip
+
         Returns:
             List of all tasks
         """
         tasks = []
         try:
             with self._get_session() as session:
-                query = text("""
+                query, params = self._paginate("""
                     SELECT id, name, description, status, priority, agent_id,
                            parent_task_id, input_data, output_data, error_message,
                            created_at, started_at, completed_at
                     FROM mcp_tasks
-                    ORDER BY created_at DESC
-                """)
-                results = session.execute(query).fetchall()
+                    ORDER BY created_at DESC, id DESC
+                """, limit, offset)
+                results = session.execute(text(query), params).fetchall()
                 
-                for result in results:
-                    # Convert JSON strings to Python dicts
-                    input_data = result[7]
-                    output_data = result[8]
-                    
-                    if input_data and isinstance(input_data, str):
-                        try:
-                            input_data = json.loads(input_data)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to decode input_data JSON for task {result[0]}")
-                            input_data = {}
-                            
-                    if output_data and isinstance(output_data, str):
-                        try:
-                            output_data = json.loads(output_data)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to decode output_data JSON for task {result[0]}")
-                            output_data = {}
-                    
-                    task = Task(
-                        id=result[0],
-                        name=result[1],
-                        description=result[2],
-                        status=result[3],
-                        priority=result[4],
-                        agent_id=result[5],
-                        parent_task_id=result[6],
-                        input_data=input_data,
-                        output_data=output_data,
-                        error_message=result[9],
-                        created_at=result[10],
-                        started_at=result[11],
-                        completed_at=result[12]
-                    )
-                    tasks.append(task)
+                tasks = [self._task_from_row(result) for result in results]
                     
         except Exception as e:
-            logger.error(f"Error getting all tasks: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all tasks: %s", e)
         
         return tasks
 
-    def get_all_agents(self) -> List[Agent]:
+    def count_agents(self) -> int:
+        """Count all agents.
+
+        Returns:
+            The number of agents
+        """
+        try:
+            with self._get_session() as session:
+                return session.execute(text("SELECT COUNT(*) FROM mcp_agents")).scalar() or 0
+        except Exception as e:
+            logger.exception("Error counting agents: %s", e)
+            return 0
+
+    def get_all_agents(self, limit: Optional[int] = None, offset: int = 0) -> List[Agent]:
         """Get all agents.
 
+        Args:
+            limit: Maximum number of agents to return, None for no limit
+            offset: Number of agents to skip
+
         Returns:
             List of all agents
         """
         agents = []
         try:
             with self._get_session() as session:
-                query = text("""
+                query, params = self._paginate("""
                     SELECT id, name, type, capabilities, status, metadata, created_at, updated_at
                     FROM mcp_agents
-                    ORDER BY created_at DESC
-                """)
-                results = session.execute(query).fetchall()
+                    ORDER BY created_at DESC, id DESC
+                """, limit, offset)
+                results = session.execute(text(query), params).fetchall()
                 
-                for result in results:
-                    # Convert JSON strings to Python dicts
-                    capabilities = result[3]
-                    metadata = result[5]
-                    
-                    if capabilities and isinstance(capabilities, str):
-                        try:
-                            capabilities = json.loads(capabilities)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to decode capabilities JSON for agent {result[0]}")
-                            capabilities = {}
-                            
-                    if metadata and isinstance(metadata, str):
-                        try:
-                            metadata = json.loads(metadata)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to decode metadata JSON for agent {result[0]}")
-                            metadata = {}
-                    
-                    agent = Agent(
-                        id=result[0],
-                        name=result[1],
-                        type=result[2],
-                        capabilities=capabilities,
-                        status=result[4],
-                        metadata=metadata,
-                        created_at=result[6],
-                        updated_at=result[7]
-                    )
-                    agents.append(agent)
+                agents = [self._agent_from_row(result) for result in results]
                     
         except Exception as e:
-            logger.error(f"Error getting all agents: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting all agents: %s", e)
+        
+        return agents 
+
+    @staticmethod
+    def _task_from_row(result) -> Task:
+        """Convert an mcp_tasks row (in _TASK_COLUMNS order) into a Task."""
+        # Convert JSON strings to Python dicts
+        input_data = result[7]
+        output_data = result[8]
+        
+        if input_data and isinstance(input_data, str):
+            try:
+                input_data = json.loads(input_data)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to decode input_data JSON for task {result[0]}")
+                input_data = {}
+                
+        if output_data and isinstance(output_data, str):
+            try:
+                output_data = json.loads(output_data)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to decode output_data JSON for task {result[0]}")
+                output_data = {}
+        
+        return Task(
+            id=result[0],
+            name=result[1],
+            description=result[2],
+            status=result[3],
+            priority=result[4],
+            agent_id=result[5],
+            parent_task_id=result[6],
+            input_data=input_data,
+            output_data=output_data,
+            error_message=result[9],
+            created_at=result[10],
+            started_at=result[11],
+            completed_at=result[12]
+        )
+
+    @staticmethod
+    def _agent_from_row(result) -> Agent:
+        """Convert an mcp_agents row (in _AGENT_COLUMNS order) into an Agent."""
+        # Convert JSON strings to Python dicts
+        capabilities = result[3]
+        metadata = result[5]
+        
+        if capabilities and isinstance(capabilities, str):
+            try:
+                capabilities = json.loads(capabilities)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to decode capabilities JSON for agent {result[0]}")
+                capabilities = {}
+                
+        if metadata and isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                logger.warning(f"Failed to decode metadata JSON for agent {result[0]}")
+                metadata = {}
         
-        return agents 
\ No newline at end of file
+        return Agent(
+            id=result[0],
+            name=result[1],
+            type=result[2],
+            capabilities=capabilities,
+            status=result[4],
+            metadata=metadata,
+            created_at=result[6],
+            updated_at=result[7]
+        )
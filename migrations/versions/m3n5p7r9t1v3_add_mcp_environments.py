@@ -0,0 +1,33 @@
+"""Add mcp_environments table
+
+Revision ID: m3n5p7r9t1v3
+Revises: k2l4m6n8p0r2
+Create Date: 2024-05-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'm3n5p7r9t1v3'
+down_revision = 'k2l4m6n8p0r2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Skip creating the table if it already exists (e.g. created by sql/init.sql)
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'mcp_environments' not in inspector.get_table_names():
+        op.create_table(
+            'mcp_environments',
+            sa.Column('id', sa.String(32), primary_key=True),
+            sa.Column('name', sa.String(128), nullable=False),
+            sa.Column('type', sa.String(32), nullable=False),
+            sa.Column('config', postgresql.JSONB(), nullable=False, server_default='{}'),
+            sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.func.now()),
+        )
+
+def downgrade():
+    op.drop_table('mcp_environments')
@@ -14,6 +14,10 @@ with open("README.md", "r", encoding="utf-8") as fh:
 requirements = [
     "fastapi>=0.104.0",
     "uvicorn>=0.23.2",
+    "uvloop>=0.19.0; sys_platform != 'win32'",
+    "httptools>=0.6.1",
+    "gunicorn>=21.2.0; sys_platform != 'win32'",
+    "orjson>=3.9.10",
     "pydantic>=2.4.2",
     "sqlalchemy>=2.0.22",
     "langchain>=0.0.335",
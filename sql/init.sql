@@ -112,6 +112,16 @@ CREATE TABLE IF NOT EXISTS llm_tasks (
     completed_at TIMESTAMP
 );
 
+-- Table: mcp_environments
+-- Environment definitions shared by all API workers; instances are rebuilt from config on demand
+CREATE TABLE IF NOT EXISTS mcp_environments (
+    id VARCHAR(32) PRIMARY KEY,
+    name VARCHAR(128) NOT NULL,
+    type VARCHAR(32) NOT NULL,        -- e.g. 'api', 'memory', 'filesystem'
+    config JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_mcp_tasks_status ON mcp_tasks(status);
 CREATE INDEX IF NOT EXISTS idx_mcp_tasks_agent_id ON mcp_tasks(agent_id);
@@ -51,7 +51,9 @@ def main():
             host="0.0.0.0",
             port=port,
             log_level="debug",
-            reload=True
+            reload=True,
+            loop="uvloop" if sys.platform != "win32" else "asyncio",
+            http="httptools"
         )
         
     except Exception as e:
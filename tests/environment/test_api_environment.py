@@ -1,8 +1,9 @@
 """Unit tests for the APIEnvironment class."""
 
+import asyncio
 import json
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 from agi_mcp_agent.environment import APIEnvironment
 
@@ -22,7 +23,7 @@ class TestAPIEnvironment(unittest.TestCase):
         """Clean up after tests."""
         self.api_env.close()
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_get_request(self, mock_request):
         """Test making a GET request."""
         # Configure the mock
@@ -31,6 +32,7 @@ class TestAPIEnvironment(unittest.TestCase):
         mock_response.json.return_value = {"message": "Hello, World!"}
         mock_response.headers = {"Content-Type": "application/json"}
         mock_response.text = json.dumps({"message": "Hello, World!"})
+        mock_response.content = json.dumps({"message": "Hello, World!"}).encode()
         mock_request.return_value = mock_response
 
         # Execute the action
@@ -53,7 +55,7 @@ class TestAPIEnvironment(unittest.TestCase):
         self.assertEqual(kwargs["params"], {"foo": "bar"})
         self.assertEqual(kwargs["headers"]["User-Agent"], "Test-Agent")
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_post_request(self, mock_request):
         """Test making a POST request."""
         # Configure the mock
@@ -62,6 +64,7 @@ class TestAPIEnvironment(unittest.TestCase):
         mock_response.json.return_value = {"id": 123, "status": "created"}
         mock_response.headers = {"Content-Type": "application/json"}
         mock_response.text = json.dumps({"id": 123, "status": "created"})
+        mock_response.content = json.dumps({"id": 123, "status": "created"}).encode()
         mock_request.return_value = mock_response
 
         # Execute the action
@@ -85,7 +88,7 @@ class TestAPIEnvironment(unittest.TestCase):
         self.assertEqual(kwargs["json"], {"name": "Test User", "email": "test@example.com"})
         self.assertEqual(kwargs["headers"]["User-Agent"], "Test-Agent")
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_error_handling(self, mock_request):
         """Test handling of error responses."""
         # Configure the mock to return an error
@@ -108,7 +111,7 @@ class TestAPIEnvironment(unittest.TestCase):
         self.assertEqual(result["status_code"], 404)
         self.assertEqual(result["content"], "Not Found")
 
-    @patch('requests.request')
+    @patch('requests.Session.request')
     def test_request_with_headers(self, mock_request):
         """Test making a request with custom headers."""
         # Create an environment with custom headers
@@ -124,6 +127,7 @@ class TestAPIEnvironment(unittest.TestCase):
         mock_response.json.return_value = {"authenticated": True}
         mock_response.headers = {"Content-Type": "application/json"}
         mock_response.text = json.dumps({"authenticated": True})
+        mock_response.content = json.dumps({"authenticated": True}).encode()
         mock_request.return_value = mock_response
 
         # Execute the action
@@ -144,6 +148,62 @@ class TestAPIEnvironment(unittest.TestCase):
         # Clean up
         api_env_with_headers.close()
 
+    @patch('requests.Session.request')
+    def test_session_reused(self, mock_request):
+        """Test that synchronous requests share one pooled session."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {"Content-Type": "text/plain"}
+        mock_response.text = "ok"
+        mock_request.return_value = mock_response
+
+        session = self.api_env.get_http_session()
+        self.api_env.execute_action({"method": "get", "endpoint": "get"})
+        self.api_env.execute_action({"method": "get", "endpoint": "get"})
+
+        self.assertIs(self.api_env.get_http_session(), session)
+        self.assertEqual(mock_request.call_count, 2)
+
+        # Closing releases the pooled session
+        self.api_env.close()
+        self.assertIsNone(self.api_env.http_session)
+
+    def test_shared_async_session(self):
+        """Test that a shared aiohttp session is used but not closed."""
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.headers = {"Content-Type": "text/plain"}
+        mock_response.content_length = 2
+        mock_response.text = AsyncMock(return_value="ok")
+        shared = MagicMock()
+        shared.closed = False
+        shared.request = AsyncMock(return_value=mock_response)
+
+        api_env = APIEnvironment(
+            name="test-shared",
+            base_url="https://httpbin.org",
+            headers={"User-Agent": "Test-Agent"},
+            session=shared
+        )
+
+        async def run():
+            self.assertIs(await api_env.create_session(), shared)
+            result = await api_env.execute_action_async({"method": "get", "endpoint": "get"})
+            await api_env.close_async()
+            return result
+
+        result = asyncio.run(run())
+        self.assertTrue(result["success"])
+        self.assertIs(type(result["headers"]), dict)
+
+        # The environment's default headers are sent with each request
+        _, kwargs = shared.request.call_args
+        self.assertEqual(kwargs["headers"]["User-Agent"], "Test-Agent")
+
+        # The shared session belongs to the caller
+        shared.close.assert_not_called()
+        self.assertIs(api_env.session, shared)
+
     def test_get_observation(self):
         """Test getting an observation from the environment."""
         # The state structure is different in the implementation
@@ -0,0 +1,79 @@
+"""Unit tests for the BrowserMCPEnvironment class."""
+
+import copy
+import dataclasses
+import pickle
+import unittest
+from unittest.mock import patch
+
+from agi_mcp_agent.environment.browser_mcp_environment import BrowserMCPEnvironment, SearchResult
+
+
+class TestSearchResult(unittest.TestCase):
+    """Test cases for the SearchResult class."""
+
+    def setUp(self):
+        """Create a search result."""
+        self.result = SearchResult("Python docs", "https://docs.python.org", "python")
+
+    def test_copy_and_pickle(self):
+        """Test that the frozen slotted result can be copied and pickled."""
+        self.assertEqual(copy.copy(self.result), self.result)
+        self.assertEqual(copy.deepcopy(self.result), self.result)
+        self.assertEqual(pickle.loads(pickle.dumps(self.result)), self.result)
+
+    def test_frozen(self):
+        """Test that fields cannot be reassigned."""
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            self.result.title = "changed"
+
+    def test_as_dict(self):
+        """Test conversion to the dict form used by actions."""
+        self.assertEqual(self.result.as_dict(), {
+            "title": "Python docs",
+            "url": "https://docs.python.org",
+            "snippet": "python"
+        })
+
+
+class TestBrowserMCPEnvironment(unittest.TestCase):
+    """Test cases for the BrowserMCPEnvironment class."""
+
+    def setUp(self):
+        """Set up a test environment."""
+        self.browser_env = BrowserMCPEnvironment(name="test-browser")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.browser_env.close()
+
+    def test_batch_rejects_actions_without_results(self):
+        """Test that batched actions depending on the last search need explicit results."""
+        results = [{"title": "Python docs", "url": "https://docs.python.org", "snippet": "python"}]
+        with patch.object(self.browser_env, "_google_search", return_value={"success": True}) as search:
+            batch = self.browser_env.execute_actions_batch([
+                {"operation": "google_search", "query": "python"},
+                {"operation": "analyze_results", "query": "python"},
+                {"operation": "analyze_results", "query": "python", "results": results},
+            ])
+
+        search.assert_called_once()
+        self.assertTrue(batch[0]["success"])
+        self.assertFalse(batch[1]["success"])
+        self.assertIn("explicit results", batch[1]["error"])
+        self.assertTrue(batch[2]["success"])
+
+
+    def test_reset_clears_search_state(self):
+        """Test that reset clears the search state attributes."""
+        self.browser_env.last_search_query = "python"
+        self.browser_env.last_search_results = [{"title": "t", "url": "u", "snippet": "s"}]
+
+        self.browser_env.reset()
+
+        self.assertIsNone(self.browser_env.last_search_query)
+        self.assertEqual(self.browser_env.last_search_results, [])
+        self.assertFalse(hasattr(self.browser_env, "state"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Unit tests for the DatabaseEnvironment class."""
+
+import os
+import tempfile
+import unittest
+
+from agi_mcp_agent.environment import DatabaseEnvironment
+from agi_mcp_agent.environment import database_environment
+
+
+class TestDatabaseEnvironment(unittest.TestCase):
+    """Test cases for the DatabaseEnvironment class."""
+
+    def setUp(self):
+        """Set up an in-memory database with two related tables."""
+        self.db_env = DatabaseEnvironment(
+            name="test-db",
+            connection_string="sqlite:///:memory:",
+            max_results=2
+        )
+        for statement in (
+            "CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+            "CREATE TABLE books (id INTEGER PRIMARY KEY, author_id INTEGER REFERENCES authors(id), "
+            "published DATE)",
+            "CREATE INDEX ix_books_author ON books (author_id)",
+            "INSERT INTO authors (id, name) VALUES (1, 'Ann'), (2, 'Bob'), (3, 'Cy')",
+        ):
+            result = self.db_env.execute_action({"operation": "execute", "statement": statement})
+            self.assertTrue(result["success"], result)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db_env.close()
+
+    def test_query_truncates_to_max_results(self):
+        """Test that queries return at most max_results rows and report truncation."""
+        result = self.db_env.execute_action({
+            "operation": "query",
+            "query": "SELECT id, name FROM authors ORDER BY id"
+        })
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["records"], [{"id": 1, "name": "Ann"}, {"id": 2, "name": "Bob"}])
+        self.assertTrue(result["truncated"])
+
+        result = self.db_env.execute_action({
+            "operation": "query",
+            "query": "SELECT id FROM authors ORDER BY id",
+            "max_results": 3
+        })
+        self.assertEqual(result["record_count"], 3)
+        self.assertFalse(result["truncated"])
+
+    def test_describe_tables(self):
+        """Test describing several tables in one action."""
+        result = self.db_env.execute_action({
+            "operation": "describe_tables",
+            "tables": ["books", "authors"]
+        })
+
+        self.assertTrue(result["success"])
+        self.assertEqual([t["table"] for t in result["tables"]], ["books", "authors"])
+        books = result["tables"][0]
+        self.assertEqual([c["name"] for c in books["columns"]], ["id", "author_id", "published"])
+        self.assertEqual(books["primary_key"], ["id"])
+        self.assertEqual(books["foreign_keys"][0]["referred_table"], "authors")
+        self.assertEqual(books["indexes"][0]["columns"], ["author_id"])
+
+        single = self.db_env.execute_action({"operation": "describe_table", "table": "books"})
+        self.assertTrue(single["success"])
+        self.assertEqual(single["columns"], books["columns"])
+
+    def test_describe_tables_missing(self):
+        """Test that unknown tables are reported."""
+        result = self.db_env.execute_action({
+            "operation": "describe_tables",
+            "tables": ["books", "nope"]
+        })
+
+        self.assertFalse(result["success"])
+        self.assertIn("nope", result["error"])
+
+
+class TestSharedEngine(unittest.TestCase):
+    """Test cases for the process-wide engine cache."""
+
+    def setUp(self):
+        """Create a file-based SQLite database that can be shared."""
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        self.connection_string = f"sqlite:///{self.path}"
+
+    def test_environments_share_and_dispose_engine(self):
+        """Test that two environments share one engine until both are closed."""
+        env1 = DatabaseEnvironment(name="db-1", connection_string=self.connection_string)
+        env2 = DatabaseEnvironment(name="db-2", connection_string=self.connection_string)
+        key = env1._engine_key
+
+        self.assertIs(env1.engine, env2.engine)
+        self.assertEqual(database_environment._ENGINE_REFS[key], 2)
+
+        env1.close()
+        self.assertIn(key, database_environment._ENGINE_CACHE)
+        result = env2.execute_action({"operation": "query", "query": "SELECT 1 AS one"})
+        self.assertEqual(result["records"], [{"one": 1}])
+
+        env2.close()
+        self.assertNotIn(key, database_environment._ENGINE_CACHE)
+        self.assertNotIn(key, database_environment._ENGINE_REFS)
+
+        # 重复关闭不会重复归还引用
+        env1.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Unit tests for the MemoryEnvironment class."""
 
+import asyncio
 import json
 import os
 import shutil
@@ -196,6 +197,25 @@ class TestMemoryEnvironment(unittest.TestCase):
         self.assertEqual(retrieve_result["data"]["important"], True)
         self.assertEqual(retrieve_result["data"]["value"], 42)
         self.assertEqual(retrieve_result["metadata"]["tags"], ["persistent"])
+
+    def test_async_wrappers(self):
+        """Test that the async variants delegate to the synchronous methods."""
+        store_result = asyncio.run(self.memory_env.execute_action_async({
+            "operation": "store",
+            "key": "async-key",
+            "data": {"async": True}
+        }))
+        self.assertTrue(store_result["success"])
+
+        retrieve_result = asyncio.run(self.memory_env.execute_action_async({
+            "operation": "retrieve",
+            "key": "async-key"
+        }))
+        self.assertTrue(retrieve_result["success"])
+        self.assertEqual(retrieve_result["data"], {"async": True})
+
+        observation = asyncio.run(self.memory_env.get_observation_async())
+        self.assertEqual(observation, self.memory_env.get_observation())
         
 
 if __name__ == "__main__":
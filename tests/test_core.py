@@ -0,0 +1,53 @@
+"""Unit tests for MasterControlProgram task scheduling."""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from agi_mcp_agent.mcp.core import MasterControlProgram
+from agi_mcp_agent.mcp.models import Agent, Task
+
+
+class TestTaskDispatch(unittest.TestCase):
+    """Test cases for capability-aware task dispatch."""
+
+    def setUp(self):
+        """Create an MCP backed by a mocked repository."""
+        # 跳过__init__，避免连接数据库
+        self.mcp = MasterControlProgram.__new__(MasterControlProgram)
+        self.mcp.repository = MagicMock()
+        self.mcp.repository.assign_task_to_agent.return_value = True
+        self.mcp.repository.get_available_agents.return_value = [
+            Agent(id=1, name="searcher", type="llm", capabilities={"search": {}}),
+            Agent(id=2, name="coder", type="llm", capabilities=["code"]),
+        ]
+
+    def dispatch(self, tasks):
+        """Run one scheduling pass and return the (task, agent) assignments."""
+        self.mcp.repository.get_tasks_by_status.return_value = tasks
+        asyncio.run(self.mcp._process_task_queue())
+        return [call.args for call in self.mcp.repository.assign_task_to_agent.call_args_list]
+
+    def test_matched_unmatched_and_unconstrained(self):
+        """Test that tasks go to capable agents and unmatched tasks stay pending."""
+        assignments = self.dispatch([
+            Task(id=10, name="write code", input_data={"required_capability": "code"}),
+            Task(id=11, name="translate", input_data={"required_capability": "translate"}),
+            Task(id=12, name="anything"),
+        ])
+
+        # 任务11没有匹配的代理，保持pending；任务12取剩余的空闲代理
+        self.assertEqual(assignments, [(10, 2), (12, 1)])
+
+    def test_agent_used_once_per_pass(self):
+        """Test that an agent is not assigned two tasks in the same pass."""
+        assignments = self.dispatch([
+            Task(id=20, name="first", input_data={"required_capability": "code"}),
+            Task(id=21, name="second", input_data={"required_capability": "code"}),
+        ])
+
+        self.assertEqual(assignments, [(20, 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
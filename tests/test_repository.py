@@ -0,0 +1,42 @@
+"""Unit tests for the MCPRepository class."""
+
+import unittest
+
+from sqlalchemy import text
+
+from agi_mcp_agent.mcp.repository import MCPRepository
+
+
+class TestRepositoryPagination(unittest.TestCase):
+    """Test cases for list-query pagination."""
+
+    def setUp(self):
+        """Set up an in-memory SQLite repository with a few rows."""
+        self.repository = MCPRepository("sqlite://")
+        with self.repository.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO items (id) VALUES (1), (2), (3), (4)"))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.repository.dispose()
+
+    def fetch_ids(self, limit, offset):
+        """Run a paginated query and return the selected ids."""
+        query, params = self.repository._paginate("SELECT id FROM items ORDER BY id", limit, offset)
+        with self.repository.engine.connect() as conn:
+            return [row[0] for row in conn.execute(text(query), params)]
+
+    def test_unpaginated(self):
+        """Test that no limit returns every row instead of binding LIMIT NULL."""
+        self.assertEqual(self.fetch_ids(None, 0), [1, 2, 3, 4])
+
+    def test_limit_and_offset(self):
+        """Test limits and offsets, including an offset without a limit."""
+        self.assertEqual(self.fetch_ids(2, 0), [1, 2])
+        self.assertEqual(self.fetch_ids(2, 1), [2, 3])
+        self.assertEqual(self.fetch_ids(None, 3), [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
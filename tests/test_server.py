@@ -0,0 +1,91 @@
+"""Tests for the FastAPI server routes."""
+
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+from multidict import CIMultiDict, CIMultiDictProxy
+
+# 服务器模块导入时即连接数据库，测试使用内存SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from agi_mcp_agent.api import server
+from agi_mcp_agent.environment import APIEnvironment
+
+
+class TestEnvironmentActionRoutes(unittest.TestCase):
+    """Test cases for the environment action routes."""
+
+    def setUp(self):
+        """Register an API environment backed by a mocked aiohttp session."""
+        self.response = MagicMock()
+        self.response.status = 200
+        # aiohttp返回的是只读的多值请求头，而不是dict
+        self.response.headers = CIMultiDictProxy(CIMultiDict([
+            ("Content-Type", "application/json"),
+            ("Set-Cookie", "a=1"),
+            ("Set-Cookie", "b=2"),
+        ]))
+        self.response.content_length = 16
+        self.response.json = AsyncMock(return_value={"message": "ok"})
+        self.session = MagicMock()
+        self.session.closed = False
+        self.session.request = AsyncMock(return_value=self.response)
+
+        self.env = APIEnvironment(
+            name="test-api",
+            base_url="https://httpbin.org",
+            session=self.session
+        )
+        registry = MagicMock()
+        registry.get = AsyncMock(return_value=server.EnvironmentEntry(env=self.env, type="api"))
+        patcher = patch.object(server, "environments", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(server.app)
+
+    def test_action_returns_serializable_headers(self):
+        """Test that multidict response headers serialize in the action route."""
+        response = self.client.post(
+            "/environments/env-1/action",
+            json={"action": {"method": "get", "endpoint": "get"}}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["success"])
+        self.assertEqual(body["result"]["content"], {"message": "ok"})
+        self.assertEqual(body["result"]["headers"]["Content-Type"], "application/json")
+
+    def test_action_ignores_stream_key(self):
+        """Test that a client-supplied stream key still returns a buffered body."""
+        self.response.content_length = 10 * 1024 * 1024
+        response = self.client.post(
+            "/environments/env-1/action",
+            json={"action": {"method": "get", "endpoint": "get", "stream": True}}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()["result"]
+        self.assertNotIn("stream", result)
+        self.assertEqual(result["content"], {"message": "ok"})
+        self.response.release.assert_called_once()
+
+
+
+class TestEnvironmentFactories(unittest.TestCase):
+    """Test cases for building environments from their configuration."""
+
+    def test_mcp_factory(self):
+        """Test that the mcp factory passes its server configs to MCPEnvironment."""
+        env = server._ENV_FACTORIES["mcp"]({"server_configs": {}, "timeout": 5}, "test-mcp")
+        try:
+            self.assertIsInstance(env, server.MCPEnvironment)
+            self.assertEqual(env.server_configs, {})
+            self.assertEqual(env.timeout, 5)
+        finally:
+            env.close()
+
+if __name__ == "__main__":
+    unittest.main()